@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+GUI cold-start benchmark
+Launches `gui_app.py --startup-time` in fresh interpreters and reports the
+median time until the window is interactive, both as measured inside the
+app (from its first line) and as process wall time. Exits 1 when the
+median in-app time exceeds --budget milliseconds.
+
+    python benchmarks/gui_startup.py --runs 10 --budget 1000
+
+Needs Tk and a display; without them it says so and exits 0.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GUI_APP = os.path.join(HERE, '..', 'src', 'gui_app.py')
+
+def measure(extra_args=()):
+    """One cold start; returns (in-app ms, process wall ms)"""
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, GUI_APP, '--startup-time', *extra_args],
+                         capture_output=True, text=True)
+    wall = (time.perf_counter() - start) * 1000
+    if out.returncode:
+        raise RuntimeError(f"gui_app.py failed:\n{out.stderr}")
+    return float(out.stdout.split()[-1]), wall
+
+def _gui_available():
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+    except Exception as e:  # ImportError, or TclError without a display
+        return str(e) or type(e).__name__
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure GUI cold-start time")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts to measure (median is kept)")
+    parser.add_argument("--budget", type=float, default=1000,
+                      help="Fail when the median in-app time exceeds this many ms (default: %(default)s)")
+    parser.add_argument("--splash", action="store_true", help="Measure with the splash screen enabled")
+    args = parser.parse_args(argv)
+
+    reason = _gui_available()
+    if reason:
+        print(f"GUI unavailable, skipping: {reason}", file=sys.stderr)
+        return 0
+
+    measure()  # Warm the OS file cache so every run sees the same disk state
+    runs = [measure(['--splash'] if args.splash else []) for _ in range(args.runs)]
+    ready = statistics.median(r[0] for r in runs)
+    wall = statistics.median(r[1] for r in runs)
+    print(f"interactive after {ready:.1f} ms (process wall {wall:.1f} ms, "
+          f"median of {args.runs}, budget {args.budget:.0f} ms)")
+    if ready > args.budget:
+        print(f"REGRESSION startup {ready:.1f} ms > {args.budget:.0f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
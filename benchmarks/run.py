@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Carrier benchmark suite
+Generates synthetic covers and payloads of several sizes for every
+carrier, measures encode/decode throughput and memory, writes the results
+as JSON and fails (exit status 1) when a run regresses past a baseline.
+
+Each case runs in a fresh interpreter so peak RSS belongs to that case
+alone. Timings are the best of --repeat runs; tracemalloc peaks come from
+one extra traced run so tracing does not skew the timings. Small cases
+repeat for at least MIN_TIME seconds to keep the best time stable.
+
+    python benchmarks/run.py                          # compare with baseline.json
+    python benchmarks/run.py --sizes 1K 64K --carrier audio
+    python benchmarks/run.py --update-baseline        # after a deliberate change
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+BASELINE = os.path.join(HERE, 'baseline.json')
+CARRIERS = ('image', 'audio', 'pdf')
+SIZES = ('1K', '64K', '1M')
+HEADROOM = 1.05  # Covers are generated this much larger than the payload needs
+SEED = 1234
+MIN_TIME = 1.0  # Keep repeating a case for at least this many seconds
+NOISE_FLOOR = 0.005  # Throughputs of faster steps are too noisy to compare
+# Metric -> True when bigger is better
+METRICS = {
+    'encode_payload_mbps': True,
+    'decode_payload_mbps': True,
+    'encode_cover_mbps': True,
+    'decode_cover_mbps': True,
+    'peak_rss_mb': False,
+    'encode_tracemalloc_mb': False,
+    'decode_tracemalloc_mb': False,
+}
+
+def parse_size(text):
+    """'64K' -> 65536"""
+    units = {'K': 1 << 10, 'M': 1 << 20}
+    text = text.upper()
+    return int(text[:-1]) * units[text[-1]] if text[-1] in units else int(text)
+
+def make_payload(size, seed=SEED):
+    """Deterministic printable text of size bytes (round-trips as str)"""
+    import numpy as np
+
+    alphabet = np.frombuffer(b'abcdefghijklmnopqrstuvwxyz0123456789 .,-\n', dtype=np.uint8)
+    return alphabet[np.random.default_rng(seed).integers(0, len(alphabet), size)].tobytes().decode()
+
+def make_cover(carrier, payload_size, directory, seed=SEED):
+    """Write a synthetic cover that holds payload_size bytes; returns its path"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    bits = (payload_size + 64) * 8 * HEADROOM  # 64 bytes covers any header
+    if carrier == 'image':
+        from PIL import Image
+        side = math.ceil(math.sqrt(bits / 3))
+        path = os.path.join(directory, 'cover.png')
+        pixels = rng.integers(0, 256, (side, side, 3), dtype=np.uint8)
+        Image.fromarray(pixels, 'RGB').save(path, compress_level=1)
+    elif carrier == 'audio':
+        import wave
+        frames = math.ceil(bits / 2)
+        path = os.path.join(directory, 'cover.wav')
+        with wave.open(path, 'wb') as audio:
+            audio.setnchannels(2)
+            audio.setsampwidth(2)
+            audio.setframerate(44100)
+            audio.writeframes(rng.integers(-2000, 2000, frames * 2, dtype=np.int16).tobytes())
+    elif carrier == 'pdf':
+        from PyPDF2 import PdfWriter
+        path = os.path.join(directory, 'cover.pdf')
+        writer = PdfWriter()
+        for _ in range(10):
+            writer.add_blank_page(width=612, height=792)
+        with open(path, 'wb') as f:
+            writer.write(f)
+    else:
+        raise ValueError(f"Unknown carrier type: {carrier}")
+    return path
+
+def _options(carrier):
+    # PDF metadata mode is meant for short text; bulk payloads use a stream
+    return {'mode': 'stream'} if carrier == 'pdf' else {}
+
+def run_case(carrier, size, repeat=3):
+    """Benchmark one carrier/payload size in this process; returns a result dict"""
+    import carriers
+
+    plugin = carriers.get(carrier)
+    message = make_payload(size)
+    with tempfile.TemporaryDirectory() as directory:
+        cover = make_cover(carrier, size, directory)
+        output = os.path.join(directory, 'stego' + os.path.splitext(cover)[1])
+        cover_mb = os.path.getsize(cover) / 1e6
+
+        def encode():
+            plugin.embed(cover, message, output, **_options(carrier))
+
+        def decode():
+            if plugin.extract(output) != message:
+                raise AssertionError(f"{carrier} round trip failed at {size} bytes")
+
+        timings = []
+        deadline = time.perf_counter() + MIN_TIME
+        while len(timings) < repeat or time.perf_counter() < deadline:
+            timings.append(_timed(encode, decode))
+        encode_s = min(t[0] for t in timings)
+        decode_s = min(t[1] for t in timings)
+        tracemalloc.start()
+        encode()
+        encode_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        decode()
+        decode_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    payload_mb = size / 1e6
+    return {
+        'carrier': carrier,
+        'size': size,
+        'cover_mb': round(cover_mb, 3),
+        'encode_s': round(encode_s, 6),
+        'decode_s': round(decode_s, 6),
+        'encode_payload_mbps': round(payload_mb / encode_s, 3),
+        'decode_payload_mbps': round(payload_mb / decode_s, 3),
+        'encode_cover_mbps': round(cover_mb / encode_s, 3),
+        'decode_cover_mbps': round(cover_mb / decode_s, 3),
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                             / (1e6 if sys.platform == 'darwin' else 1e3), 1),
+        'encode_tracemalloc_mb': round(encode_peak / 1e6, 3),
+        'decode_tracemalloc_mb': round(decode_peak / 1e6, 3),
+    }
+
+def _timed(encode, decode):
+    start = time.perf_counter()
+    encode()
+    middle = time.perf_counter()
+    decode()
+    return middle - start, time.perf_counter() - middle
+
+def run_suite(carrier_names=CARRIERS, sizes=SIZES, repeat=3):
+    """Run every case in its own interpreter; returns the results document"""
+    results = []
+    for carrier in carrier_names:
+        for size in sizes:
+            case = json.dumps({'carrier': carrier, 'size': parse_size(size), 'repeat': repeat})
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), '--case', case],
+                                 capture_output=True, text=True)
+            if out.returncode:
+                raise RuntimeError(f"{carrier} {size} failed:\n{out.stderr}")
+            results.append(json.loads(out.stdout))
+            print(_describe(results[-1]), file=sys.stderr)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+def _describe(result):
+    return (f"{result['carrier']:>5} {result['size']:>8} B: "
+            f"encode {result['encode_payload_mbps']:8.2f} MB/s, "
+            f"decode {result['decode_payload_mbps']:8.2f} MB/s, "
+            f"RSS {result['peak_rss_mb']:7.1f} MB")
+
+def compare(results, baseline, tolerance=0.3):
+    """Return messages for every metric worse than baseline by more than tolerance
+
+    Throughputs may drop and memory peaks may grow by at most tolerance
+    (a fraction). Cases missing from the baseline are not checked, nor are
+    throughputs of steps the baseline timed under NOISE_FLOOR seconds.
+    """
+    previous = {(r['carrier'], r['size']): r for r in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        old = previous.get((result['carrier'], result['size']))
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in old or not old[metric]:
+                continue
+            if metric.endswith('_mbps') and old[metric.partition('_')[0] + '_s'] < NOISE_FLOOR:
+                continue
+            ratio = result[metric] / old[metric]
+            if (ratio < 1 - tolerance) if higher_is_better else (ratio > 1 + tolerance):
+                regressions.append(f"{result['carrier']} {result['size']} B {metric}: "
+                                   f"{old[metric]} -> {result[metric]}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark carrier encode/decode")
+    parser.add_argument("--carrier", action="append", choices=CARRIERS,
+                      help="Carrier to benchmark (repeatable, default: all)")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES),
+                      help="Payload sizes, e.g. 1K 64K 1M (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Minimum timed runs per case (best is kept)")
+    parser.add_argument("-o", "--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                      help="Allowed fractional regression per metric (default: 0.3)")
+    parser.add_argument("--update-baseline", action="store_true",
+                      help="Store this run as the new baseline instead of comparing")
+    parser.add_argument("--case", help=argparse.SUPPRESS)  # Internal: run one case
+    args = parser.parse_args(argv)
+
+    if args.case:
+        case = json.loads(args.case)
+        print(json.dumps(run_case(case['carrier'], case['size'], case['repeat'])))
+        return 0
+
+    results = run_suite(args.carrier or CARRIERS, args.sizes, args.repeat)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Audio carrier: payload bits in the least significant bit of PCM WAV samples
+"""
+
+import struct
+import wave
+import numpy as np
+from bitcodec import bits_to_bytes, bytes_to_bits, embed_span, extract_lsb, span_end, split_delimited_stream
+from payload import (FLAG_CODEC, FLAG_CRC, FLAG_LAYOUT, MAX_HEADER_SIZE, finish_payload, frame_payload, header_size,
+                     prepare_payload, read_framed, read_header)
+from profiling import progress, stage
+from scatter import ScatterOrder, gather, resolve_key, scatter_reader, scatter_spans
+
+NAME = 'audio'
+EXTENSIONS = ('.wav',)
+WAV_BLOCK_FRAMES = 1 << 16  # Frames per block when streaming WAV data
+
+def validate_wav(filepath):
+    """Validate WAV file meets requirements (PCM, 1-8 channels, 8/16/24/32-bit)"""
+    try:
+        with stage('validate'), wave.open(filepath, 'rb') as wav:
+            if not 1 <= wav.getnchannels() <= 8:
+                raise ValueError("Only WAV files with 1-8 channels supported")
+            if wav.getsampwidth() not in (1, 2, 3, 4):
+                raise ValueError("Only 8/16/24/32-bit WAV files supported")
+            if wav.getframerate() not in [44100, 48000]:
+                print(f"Warning: Non-standard sample rate {wav.getframerate()}")
+            return wav.getparams()
+    except wave.Error as e:
+        raise ValueError(f"Invalid WAV file: {str(e)}")
+    except (EOFError, struct.error):  # Empty or truncated header
+        raise ValueError("Invalid WAV file: truncated header")
+
+def _wav_samples(frames, params):
+    """Return a writable (frames, channels) view of each sample's least significant byte
+
+    PCM samples are little-endian, so the first byte of every sample holds
+    its LSB whatever the sample width.
+    """
+    data = np.frombuffer(frames, dtype=np.uint8)
+    return data.reshape(-1, params.nchannels, params.sampwidth)[:, :, 0]
+
+def _wav_layout(params):
+    """Header layout byte for a WAV: channels in the low nibble, sample width above"""
+    return params.nchannels | params.sampwidth << 4
+
+def audio_capacity(params, codec=False):
+    """Largest payload in bytes a WAV with these parameters holds
+
+    codec=True counts the header byte of a compressed payload.
+    """
+    flags = FLAG_CRC | FLAG_LAYOUT | (FLAG_CODEC if codec else 0)
+    return max(params.nframes * params.nchannels // 8 - header_size(flags), 0)
+
+def _wav_reader(audio):
+    """Return read_bytes(offset, count) over the sample LSBs of an open WAV
+
+    Frames are read only as far as the requested bytes reach.
+    """
+    params = audio.getparams()
+    frame_size = params.nchannels * params.sampwidth
+    buffer = bytearray()
+    
+    def read_bytes(offset, count):
+        stop = (offset + count) * 8
+        missing = -(-stop // params.nchannels) - len(buffer) // frame_size
+        if missing > 0:
+            buffer.extend(audio.readframes(missing))
+        return bits_to_bytes(extract_lsb(_wav_samples(buffer, params), offset * 8, stop))
+    return read_bytes
+
+def _wav_run(audio, params, start, count):
+    """Sample LSB bytes of frames [start, start + count) of an open WAV"""
+    audio.setpos(start)
+    return _wav_samples(audio.readframes(count), params)
+
+def _wav_blocks(audio, block_frames):
+    """Yield frame data from an open WAV in blocks of block_frames"""
+    while True:
+        frames = audio.readframes(block_frames)
+        if not frames:
+            return
+        yield frames
+
+def encode_audio(audio_path, secret_msg, output_path, encrypt=False, block_frames=WAV_BLOCK_FRAMES,
+                 recipients=None, compress=None, scatter=None):
+    """Hide message in WAV with validation
+
+    Bits go into the LSB of each sample, interleaved across channels in
+    frame order; the WAV format is recorded in the payload header. The
+    recording is streamed in blocks of block_frames: blocks holding
+    payload bits are patched, the rest are copied through untouched, so
+    memory use does not depend on the recording length. With scatter (a
+    passphrase, or True for the encryption key) frames are used in a keyed
+    pseudo-random order instead (see scatter.py). Returns the generated
+    key when encrypt=True.
+    """
+    params = validate_wav(audio_path)
+    
+    payload, key, codec = prepare_payload(secret_msg, encrypt, recipients, compress)
+    with stage('serialize', len(payload)):
+        bits = bytes_to_bits(frame_payload(payload, layout=_wav_layout(params), codec=codec))
+    
+    if len(bits) > params.nframes * params.nchannels:
+        raise ValueError(f"Message too large for audio (max: {audio_capacity(params, bool(codec))} chars)")
+    
+    span = (0, params.nchannels, 1, bits)
+    if scatter:
+        with stage('scatter'):
+            span, = scatter_spans([span], ScatterOrder(resolve_key(scatter, key), params.nframes))
+    end = span_end(span)
+    frame_size = params.nchannels * params.sampwidth
+    with wave.open(audio_path, 'rb') as audio, wave.open(output_path, 'wb') as output:
+        output.setparams(params)
+        first = 0
+        while True:
+            with stage('read') as read:
+                frames = audio.readframes(block_frames)
+                read.nbytes = len(frames)
+            if not frames:
+                break
+            if first < end:
+                with stage('embed', len(frames)):
+                    frames = bytearray(frames)
+                    embed_span(_wav_samples(frames, params), span, first)  # Modifies frames in place
+            with stage('write', len(frames)):
+                output.writeframesraw(frames)
+            first += len(frames) // frame_size
+            progress(first, params.nframes)
+    return key
+
+def decode_audio(audio_path, decrypt=False, key=None, block_frames=WAV_BLOCK_FRAMES, scatter=None):
+    """Extract message from WAV with validation
+
+    Frames are read only until the payload is complete; with scatter
+    (which must match the encoder's) only the runs of frames holding it.
+    """
+    params = validate_wav(audio_path)
+    
+    with wave.open(audio_path, 'rb') as audio:
+        if scatter:
+            order = ScatterOrder(resolve_key(scatter, key), params.nframes)
+            fetch = lambda rows: gather(rows, lambda start, count: _wav_run(audio, params, start, count))
+            reader = scatter_reader(order, 0, params.nchannels, 1, fetch, MAX_HEADER_SIZE)
+        else:
+            reader = _wav_reader(audio)
+        
+        def locate(header):
+            if header.layout is not None and header.layout != _wav_layout(params):
+                raise ValueError("Payload was embedded in a WAV with a different channel "
+                                 "count or sample width (file was converted)")
+            return lambda offset, count: reader(header.size + offset, count)
+        
+        with stage('extract') as extract:
+            framed = read_framed(reader, locate)
+            extract.nbytes = framed and len(framed[1])
+        if framed is None and scatter:
+            raise ValueError("No payload found (wrong scatter passphrase?)")
+        if framed is None:  # Legacy format: delimiter in the LSB of every byte
+            audio.rewind()
+            blocks = _wav_blocks(audio, block_frames)
+            payload = split_delimited_stream(np.frombuffer(frames, dtype=np.uint8) & 1
+                                             for frames in blocks)
+            return finish_payload(payload, decrypt, key)
+    
+    header, payload = framed
+    return finish_payload(payload, decrypt, key, header.codec)
+
+def capacity(path):
+    """Largest payload in bytes the WAV at path holds"""
+    return audio_capacity(validate_wav(path))
+
+def detect(path):
+    """Return the payload header if the WAV carries a framed payload, else None
+
+    Only the frames holding the header are read. Scattered and legacy
+    delimiter payloads are not recognized.
+    """
+    params = validate_wav(path)
+    with wave.open(path, 'rb') as audio:
+        header = read_header(_wav_reader(audio))
+    if header is None or header.length > audio_capacity(params):
+        return None  # A chance match of the magic
+    return header
+
+embed = encode_audio
+extract = decode_audio
+
+def cli_options(args, encode):
+    """Carrier-specific keyword arguments for embed/extract from parsed CLI arguments"""
+    return {'scatter': args.scatter}
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Batch encode/decode driven by a job manifest
+Runs many jobs in one process pool instead of one interpreter per file
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+def load_manifest(path):
+    """Read jobs from a JSONL or CSV manifest (CSV needs a header row)
+
+    Each job has: type (image/audio/pdf), input, and for encoding output
+    plus message or message_file. Optional: mode (encode/decode, default
+    encode), encrypt, key, pdf_mode (metadata/stream), recipients (RSA
+    public key files, a list or ';'-separated), compress (zlib/lzma/auto)
+    and private_key (key file for decoding recipient envelopes).
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        text = f.read()
+    if path.endswith(('.jsonl', '.json')) or text.lstrip().startswith('{'):
+        jobs = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        jobs = list(csv.DictReader(io.StringIO(text)))
+    return [normalize_job(job) for job in jobs]
+
+def normalize_job(job):
+    """Fill in defaults and coerce CSV strings in a job dict, in place"""
+    job['mode'] = job.get('mode') or 'encode'
+    encrypt = job.get('encrypt')
+    job['encrypt'] = encrypt if isinstance(encrypt, bool) else str(encrypt or '').lower() in TRUE_VALUES
+    recipients = job.get('recipients') or []
+    job['recipients'] = recipients.split(';') if isinstance(recipients, str) else recipients
+    return job
+
+def _read_key(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def run_job(job):
+    """Run one manifest job through its carrier plugin; returns a result dict"""
+    import carriers
+
+    start = time.perf_counter()
+    result = {'type': job.get('type'), 'mode': job['mode'], 'input': job.get('input')}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if job['mode'] not in ('encode', 'decode'):
+                raise ValueError(f"Unknown job mode: {job['mode']}")
+            carrier = carriers.get(job.get('type'))
+            if job['mode'] == 'encode':
+                result['output'] = job.get('output')
+                message = job.get('message')
+                if not message and job.get('message_file'):
+                    with open(job['message_file'], 'rb') as f:
+                        message = f.read()
+                if not message or not job.get('output'):
+                    raise ValueError("Encode jobs need output and message or message_file")
+                options = {'recipients': [_read_key(path) for path in job.get('recipients') or []],
+                           'compress': job.get('compress') or None}
+                if job['type'] == 'pdf':
+                    options['mode'] = job.get('pdf_mode') or 'metadata'
+                key = carrier.embed(job['input'], message, job['output'], job['encrypt'], **options)
+                if key:
+                    result['key'] = key.decode()
+            else:
+                key = (job.get('key') or '').encode() or None
+                if job.get('private_key'):
+                    job['encrypt'], key = True, _read_key(job['private_key'])
+                if job['encrypt'] and not key:
+                    raise ValueError("Encrypted decode jobs need a key")
+                result['message'] = carrier.extract(job['input'], job['encrypt'], key)
+        result['status'] = 'ok'
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    result['seconds'] = round(time.perf_counter() - start, 6)
+    return result
+
+def run_batch(jobs, workers=None, report=None):
+    """Run jobs across a process pool, writing one JSON line per finished job
+
+    Returns the number of failed jobs.
+    """
+    report = report or sys.stdout
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            result = {'job': futures[future], **future.result()}
+            failures += result['status'] != 'ok'
+            report.write(json.dumps(result) + '\n')
+            report.flush()
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="stego.py batch",
+        description="Run encode/decode jobs from a CSV or JSONL manifest"
+    )
+    parser.add_argument("manifest", help="Job manifest (.csv with header row, or .jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                      help="Worker processes (default: CPU count)")
+    parser.add_argument("-r", "--report", help="Write the JSONL report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    jobs = load_manifest(args.manifest)
+    start = time.perf_counter()
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as report:
+            failures = run_batch(jobs, args.workers, report)
+    else:
+        failures = run_batch(jobs, args.workers)
+    print(f"{len(jobs) - failures}/{len(jobs)} jobs succeeded in "
+          f"{time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Bit-level payload codec shared by the image and audio carriers
+Payloads are bytes; bits are uint8 arrays of 0/1 values, MSB first
+"""
+
+import numpy as np
+from payload import to_bytes, to_text  # Re-exported for existing callers
+
+DELIMITER = b'\xff\xfe'  # '1111111111111110' end-of-message marker
+
+def bytes_to_bits(data):
+    """Expand bytes into a 0/1 uint8 array, 8 entries per byte"""
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+def bits_to_bytes(bits):
+    """Pack a 0/1 array back into bytes, dropping any trailing partial byte"""
+    whole = len(bits) // 8 * 8
+    return np.packbits(bits[:whole]).tobytes()
+
+def find_delimiter(bits, delimiter=DELIMITER, chunk_size=1 << 20):
+    """Return the bit index of the first delimiter in a 0/1 array, or -1
+
+    The search runs chunk by chunk so it stops as soon as the marker is found.
+    """
+    pattern = (bytes_to_bits(delimiter) + ord('0')).tobytes()
+    overlap = len(pattern) - 1
+    for start in range(0, len(bits), chunk_size):
+        offset = max(start - overlap, 0)
+        chunk = bits[offset:start + chunk_size]
+        index = (chunk + ord('0')).tobytes().find(pattern)
+        if index != -1:
+            return offset + index
+    return -1
+
+def split_delimited(bits, delimiter=DELIMITER):
+    """Return the payload bytes that precede the delimiter (or all bits if absent)"""
+    end = find_delimiter(bits, delimiter)
+    if end != -1:
+        bits = bits[:end]
+    return bits_to_bytes(bits)
+
+def split_delimited_stream(chunks, delimiter=DELIMITER):
+    """Like split_delimited, over an iterable of bit arrays
+
+    Chunks are consumed only until the delimiter is found.
+    """
+    overlap = len(delimiter) * 8 - 1
+    parts = []
+    seen = 0
+    tail = np.empty(0, dtype=np.uint8)
+    for chunk in chunks:
+        window = np.concatenate([tail, chunk])
+        end = find_delimiter(window, delimiter)
+        parts.append(chunk)
+        if end != -1:
+            return bits_to_bytes(np.concatenate(parts)[:seen - len(tail) + end])
+        seen += len(chunk)
+        tail = window[-overlap:]
+    return bits_to_bytes(np.concatenate(parts)) if parts else b''
+
+def _shifts(depth):
+    return np.arange(depth - 1, -1, -1, dtype=np.uint8)
+
+def embed_lsb(values, bits, depth=1):
+    """Write bits into the low depth bits of the leading slots of values, in place
+
+    values is a 2-D (entries, channels) array, possibly a non-contiguous
+    view; slots run row-major, each holding depth bits MSB first, and only
+    the rows covered by bits are touched.
+    """
+    channels = values.shape[1]
+    slots = -(-len(bits) // depth)
+    if len(bits) < slots * depth:
+        bits = np.concatenate([bits, np.zeros(slots * depth - len(bits), dtype=np.uint8)])
+    symbols = (bits.reshape(slots, depth) << _shifts(depth)).sum(axis=1, dtype=np.uint8)
+    rows = -(-slots // channels)
+    flat = values[:rows].reshape(-1)
+    flat[:slots] = (flat[:slots] >> depth << depth) | symbols
+    values[:rows] = flat.reshape(rows, channels)
+
+def extract_lsb(values, start, stop, depth=1):
+    """Return bits [start, stop) from the low depth bits of a 2-D (entries, channels) array"""
+    channels = values.shape[1]
+    first_slot, last_slot = start // depth, -(-stop // depth)
+    first, last = first_slot // channels, -(-last_slot // channels)
+    symbols = values[first:last].reshape(-1)[first_slot - first * channels:last_slot - first * channels]
+    bits = ((symbols[:, None] >> _shifts(depth)) & 1).astype(np.uint8).reshape(-1)
+    offset = start - first_slot * depth
+    return bits[offset:offset + stop - start]
+
+def span_entries(bits, channels, depth=1):
+    """Number of carrier entries needed for len(bits) bits"""
+    return -(-len(bits) // (channels * depth))
+
+def span_end(span):
+    """One past the last carrier entry a span touches"""
+    first, channels, depth, bits = span
+    if isinstance(first, np.ndarray):
+        return int(first[-1]) + 1 if len(first) else 0
+    return first + span_entries(bits, channels, depth)
+
+def embed_span(values, span, offset=0):
+    """Embed the part of a span that falls inside values
+
+    span is (first entry, channels, depth, bits) in carrier coordinates;
+    values is a block of the carrier whose first row is entry offset.
+    first may also be a sorted array of entries, one per channels * depth
+    bits (see scatter.scatter_spans).
+    """
+    first, channels, depth, bits = span
+    per_entry = channels * depth
+    if isinstance(first, np.ndarray):
+        lo, hi = np.searchsorted(first, (offset, offset + len(values)))
+        if lo < hi:
+            rows = first[lo:hi] - offset
+            block = values[rows, :channels]
+            embed_lsb(block, bits[lo * per_entry:hi * per_entry], depth)
+            values[rows, :channels] = block
+        return
+    lo = max(first, offset)
+    hi = min(first + span_entries(bits, channels, depth), offset + len(values))
+    if lo < hi:
+        chunk = bits[(lo - first) * per_entry:(hi - first) * per_entry]
+        embed_lsb(values[lo - offset:, :channels], chunk, depth)
@@ -0,0 +1,44 @@
+"""
+Carrier plugin registry
+Each carrier format is a module exposing NAME, EXTENSIONS and
+capacity/embed/extract/detect/cli_options. Plugins, and the heavy
+libraries they use (NumPy, PIL, PyPDF2), are imported only when a carrier
+is selected.
+"""
+
+import importlib
+import sys
+import time
+
+# Carrier name -> plugin module; register() adds more
+PLUGINS = {
+    'image': 'image_carrier',
+    'audio': 'audio_carrier',
+    'pdf': 'pdf_carrier',
+}
+
+# Carrier name -> (import seconds, non-stdlib top-level modules it pulled in)
+import_times = {}
+
+def register(name, module):
+    """Register a carrier plugin module under name"""
+    PLUGINS[name] = module
+
+def names():
+    return list(PLUGINS)
+
+def get(name):
+    """Return the plugin module for a carrier, importing it on first use"""
+    if name not in PLUGINS:
+        raise ValueError(f"Unknown carrier type: {name}")
+    module_name = PLUGINS[name]
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    before = {loaded.partition('.')[0] for loaded in sys.modules}
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    seconds = time.perf_counter() - start
+    new = {loaded.partition('.')[0] for loaded in sys.modules} - before - sys.stdlib_module_names
+    import_times[name] = (seconds, sorted(new))
+    return module
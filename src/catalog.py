@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Cover catalog: a SQLite index of cover files and their capacities
+Covers are probed once (headers only) and refreshed incrementally, so
+picking a cover for a payload is an index lookup instead of trial opens.
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+from types import SimpleNamespace
+
+IMAGE_EXTENSIONS = ('.png', '.bmp')
+AUDIO_EXTENSIONS = ('.wav',)
+DEPTHS = (1, 2, 3, 4)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS covers (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL,
+    type TEXT NOT NULL,
+    format TEXT NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    channels INTEGER,
+    frames INTEGER,
+    sampwidth INTEGER
+);
+CREATE TABLE IF NOT EXISTS capacity (
+    path TEXT NOT NULL REFERENCES covers(path) ON DELETE CASCADE,
+    type TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    alpha INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (path, depth, alpha)
+);
+CREATE INDEX IF NOT EXISTS capacity_lookup ON capacity (type, depth, alpha, bytes);
+"""
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def probe(path):
+    """Return (cover row, capacity rows) for a cover, reading only its header"""
+    import carriers
+
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        image = carriers.get('image')
+        img = image.validate_image(path, load=False)
+        if img.mode not in ('RGB', 'RGBA'):
+            raise ValueError(f"Unsupported image mode: {img.mode}")
+        channels = len(img.getbands())
+        cover = {'type': 'image', 'format': img.format, 'width': img.width,
+                 'height': img.height, 'channels': channels}
+        capacities = [('image', depth, alpha, image.image_capacity(img.width, img.height, depth, alpha))
+                      for depth in DEPTHS for alpha in ((False, True) if img.mode == 'RGBA' else (False,))]
+    else:
+        audio = carriers.get('audio')
+        params = audio.validate_wav(path)
+        cover = {'type': 'audio', 'format': 'WAV', 'channels': params.nchannels,
+                 'frames': params.nframes, 'sampwidth': params.sampwidth}
+        capacities = [('audio', 1, False, audio.audio_capacity(params))]
+    return cover, capacities
+
+def _codec_capacity(cover_type, width, height, channels, frames, depth, alpha):
+    """Capacity of an indexed cover for a compressed payload (one more header byte)"""
+    import carriers
+
+    if cover_type == 'image':
+        return carriers.get('image').image_capacity(width, height, depth, alpha, codec=True)
+    params = SimpleNamespace(nframes=frames, nchannels=channels)
+    return carriers.get('audio').audio_capacity(params, codec=True)
+
+class Catalog:
+    """On-disk cover index keyed by path, size, mtime and content hash"""
+
+    def __init__(self, db_path):
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def refresh(self, root):
+        """Index every cover under root, re-probing only new or changed files
+
+        Returns counts of added, updated, unchanged, removed and failed files.
+        """
+        stats = dict.fromkeys(('added', 'updated', 'unchanged', 'removed', 'failed'), 0)
+        prefix = os.path.join(os.path.abspath(root), '')
+        known = {row[0]: row[1:] for row in self.db.execute(
+            "SELECT path, size, mtime, sha256 FROM covers") if row[0].startswith(prefix)}
+        seen = set()
+
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if not name.lower().endswith(IMAGE_EXTENSIONS + AUDIO_EXTENSIONS):
+                    continue
+                path = os.path.abspath(os.path.join(dirpath, name))
+                seen.add(path)
+                st = os.stat(path)
+                previous = known.get(path)
+                if previous and previous[:2] == (st.st_size, st.st_mtime):
+                    stats['unchanged'] += 1
+                    continue
+
+                digest = file_hash(path)
+                if previous and previous[2] == digest:
+                    self.db.execute("UPDATE covers SET size = ?, mtime = ? WHERE path = ?",
+                                    (st.st_size, st.st_mtime, path))
+                    stats['unchanged'] += 1
+                    continue
+                try:
+                    cover, capacities = probe(path)
+                except ValueError:
+                    if previous:  # No longer a usable cover: drop the stale entry
+                        self.db.execute("DELETE FROM covers WHERE path = ?", (path,))
+                    stats['failed'] += 1
+                    continue
+                self._store(path, st, digest, cover, capacities)
+                stats['updated' if previous else 'added'] += 1
+
+        for path in set(known) - seen:
+            self.db.execute("DELETE FROM covers WHERE path = ?", (path,))
+            stats['removed'] += 1
+        self.db.commit()
+        return stats
+
+    def _store(self, path, st, digest, cover, capacities):
+        self.db.execute("DELETE FROM covers WHERE path = ?", (path,))
+        self.db.execute(
+            "INSERT INTO covers (path, size, mtime, sha256, type, format, width, height, "
+            "channels, frames, sampwidth) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime, digest, cover['type'], cover['format'],
+             cover.get('width'), cover.get('height'), cover.get('channels'),
+             cover.get('frames'), cover.get('sampwidth')))
+        self.db.executemany(
+            "INSERT INTO capacity (path, type, depth, alpha, bytes) VALUES (?, ?, ?, ?, ?)",
+            [(path, kind, depth, int(alpha), size) for kind, depth, alpha, size in capacities])
+
+    def pick(self, payload_size, cover_type='image', depth=1, alpha=False, codec=False):
+        """Return the path of the smallest indexed cover that fits payload_size bytes
+
+        Uses the (type, depth, alpha, bytes) index, so no files are opened.
+        Stored capacities are for uncompressed payloads; with codec=True the
+        candidates are re-checked against their capacity with the codec
+        header byte, computed from the indexed dimensions. Returns None
+        when nothing fits.
+        """
+        rows = self.db.execute(
+            "SELECT path, width, height, channels, frames FROM capacity JOIN covers USING (path) "
+            "WHERE capacity.type = ? AND depth = ? AND alpha = ? AND bytes >= ? ORDER BY bytes",
+            (cover_type, depth, int(alpha), payload_size))
+        for path, width, height, channels, frames in rows:
+            if not codec or _codec_capacity(cover_type, width, height, channels, frames,
+                                            depth, alpha) >= payload_size:
+                return path
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="stego.py catalog",
+        description="Index cover files and pick the smallest one that fits a payload"
+    )
+    parser.add_argument("directories", nargs="*", help="Directories of covers to (re)index")
+    parser.add_argument("--db", default="covers.db", help="Catalog database (default: covers.db)")
+    parser.add_argument("--pick", type=int, metavar="BYTES",
+                      help="Print the smallest cover that holds BYTES of payload")
+    parser.add_argument("-t", "--type", choices=['image', 'audio'], default='image',
+                      help="Cover type for --pick")
+    parser.add_argument("--depth", type=int, choices=DEPTHS, default=1,
+                      help="Bits per image channel for --pick")
+    parser.add_argument("--alpha", action="store_true", help="Count the alpha channel for --pick")
+    args = parser.parse_args(argv)
+
+    catalog = Catalog(args.db)
+    try:
+        for directory in args.directories:
+            stats = catalog.refresh(directory)
+            print(f"{directory}: " + ", ".join(f"{count} {name}" for name, count in stats.items()))
+        if args.pick is not None:
+            path = catalog.pick(args.pick, args.type, args.depth, args.alpha)
+            if path is None:
+                print("Error: no indexed cover is large enough")
+                return 1
+            print(path)
+    finally:
+        catalog.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Thin client for the stego daemon (stego.py serve)
+Forwards regular CLI arguments to a running daemon over its Unix socket,
+so a call costs one round trip instead of a fresh interpreter and imports.
+Only the standard library is imported here.
+"""
+
+import json
+import os
+import socket
+import sys
+import tempfile
+
+def default_socket():
+    """Per-user socket path: $XDG_RUNTIME_DIR/phantomvault.sock, else in the temp dir"""
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return os.path.join(runtime, 'phantomvault.sock')
+    return os.path.join(tempfile.gettempdir(), f'phantomvault-{os.getuid()}.sock')
+
+def request(message, path=None, timeout=None):
+    """Send one request dict to the daemon and return its response dict"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or default_socket())
+        sock.sendall(json.dumps(message).encode() + b'\n')
+        with sock.makefile('rb') as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("Daemon closed the connection without a response")
+    return json.loads(line)
+
+USAGE = """usage: stego.py client [--socket PATH] [--probe FILE [-t TYPE] | --ping] [CLI ARGS ...]
+
+Forward CLI arguments (e.g. -e -t image -i in.png -o out.png -m hi) to a
+running `stego.py serve` daemon. --probe prints the capacity of a cover.
+Relative paths are resolved against the client's working directory."""
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    path = None
+    message = None
+    # Client options come first; everything after them goes to the daemon
+    while argv and argv[0] in ('--socket', '--probe', '--ping', '-h', '--help'):
+        option = argv.pop(0)
+        if option in ('-h', '--help'):
+            print(USAGE)
+            return 0
+        if option == '--ping':
+            message = {'op': 'ping'}
+            continue
+        if not argv:
+            print(f"Error: {option} needs a value", file=sys.stderr)
+            return 2
+        value = argv.pop(0)
+        if option == '--socket':
+            path = value
+        else:
+            message = {'op': 'probe', 'input': os.path.abspath(value)}
+            if argv[:1] in (['-t'], ['--type']) and len(argv) > 1:
+                message['type'] = argv[1]
+                del argv[:2]
+    if message is None:
+        message = {'op': 'run', 'argv': argv, 'cwd': os.getcwd()}
+
+    try:
+        response = request(message, path)
+    except OSError as e:
+        print(f"Error: cannot reach daemon at {path or default_socket()}: {e}", file=sys.stderr)
+        return 1
+
+    if message['op'] == 'run':
+        sys.stdout.write(response.get('stdout', ''))
+        sys.stderr.write(response.get('stderr', ''))
+        if response['status'] != 'ok' and 'exit' not in response:
+            print(f"Error: {response.get('error')}", file=sys.stderr)
+            return 1
+        return response.get('exit', 0)
+    if response['status'] != 'ok':
+        print(f"Error: {response.get('error')}")
+        return 1
+    if message['op'] == 'probe':
+        capacity = response['capacity']
+        print(f"{response['type']}: " + (f"{capacity} bytes" if capacity is not None else "unbounded"))
+    else:
+        print(f"Daemon {response['pid']} up for {response['uptime']:.0f}s, {response['workers']} workers")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Stego daemon (stego.py serve)
+An asyncio front end on a Unix socket hands requests to a process pool
+whose workers import every carrier and the crypto stack once at startup,
+so each call pays for the embedding only. Use `stego.py client` to talk
+to it from scripts.
+
+Protocol: one JSON object per line in, one JSON object per line out.
+    {"op": "run", "argv": [...], "cwd": "..."}   regular CLI arguments (not serve,
+                                                 client, batch or scan)
+    {"op": "job", "job": {...}, "cwd": "..."}    one batch manifest job
+    {"op": "probe", "input": "...", "type": "image", "options": {"depth": 2}}
+    {"op": "ping"}
+Every response has a status of "ok" or "error" (with an error message).
+Requests on one connection are answered in order; connections run in
+parallel up to the number of workers.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from client import default_socket
+
+REQUEST_LIMIT = 64 << 20  # Longest request line; long -m messages travel inline
+
+# Subcommands that start their own daemon, client or process pool: inside a
+# worker they would block it or nest pools, so run requests refuse them
+NESTED_COMMANDS = {
+    'serve': "start a second daemon",
+    'client': "connect back to the daemon",
+    'batch': "start a nested process pool; send one job request per manifest job",
+    'scan': "start a nested process pool; run it directly",
+}
+
+def _warm():
+    """Worker initializer: import the CLI, every carrier and the crypto code"""
+    import carriers
+    import stego
+    import utils
+    for name in carriers.names():
+        carriers.get(name)
+
+def _run_cli(argv):
+    import stego
+
+    if argv and argv[0] in NESTED_COMMANDS:
+        raise ValueError(f"'{argv[0]}' cannot run inside the daemon: it would {NESTED_COMMANDS[argv[0]]}")
+    stdout, stderr = io.StringIO(), io.StringIO()
+    stdin, sys.stdin = sys.stdin, io.StringIO()  # No interactive key prompts
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = stego.main(argv)
+    except SystemExit as e:  # argparse errors and --help
+        code = e.code if isinstance(e.code, int) else 1
+    finally:
+        sys.stdin = stdin
+    return {'status': 'ok' if code == 0 else 'error', 'exit': code,
+            'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+def _probe(path, kind=None, options=None):
+    import carriers
+
+    if kind is None:
+        for name in carriers.names():
+            if path.lower().endswith(carriers.get(name).EXTENSIONS):
+                kind = name
+                break
+        else:
+            raise ValueError(f"Cannot tell the carrier type of {path}; pass a type")
+    return {'status': 'ok', 'type': kind,
+            'capacity': carriers.get(kind).capacity(path, **(options or {}))}
+
+def handle(request):
+    """Run one request in a worker process; returns the response dict"""
+    cwd = os.getcwd()
+    try:
+        if request.get('cwd'):
+            os.chdir(request['cwd'])
+        op = request.get('op')
+        if op == 'run':
+            return _run_cli([str(arg) for arg in request['argv']])
+        if op == 'job':
+            import batch
+            return batch.run_job(batch.normalize_job(dict(request['job'])))
+        if op == 'probe':
+            return _probe(request['input'], request.get('type'), request.get('options'))
+        raise ValueError(f"Unknown request op: {op}")
+    except Exception as e:
+        return {'status': 'error', 'error': str(e)}
+    finally:
+        os.chdir(cwd)
+
+class Daemon:
+    """Unix socket server dispatching requests to a warm process pool"""
+
+    def __init__(self, path, workers=None):
+        self.path = path
+        self.workers = workers or os.cpu_count()
+        self.started = time.monotonic()
+        self.pool = None
+        self.stop = None  # Set by serve(); thread-safe shutdown
+
+    async def _respond(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Requests must be JSON objects")
+        except ValueError as e:
+            return {'status': 'error', 'error': f"Bad request: {e}"}
+        if request.get('op') == 'ping':
+            return {'status': 'ok', 'pid': os.getpid(), 'workers': self.workers,
+                    'uptime': time.monotonic() - self.started}
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.pool, handle, request)
+        except Exception as e:  # BrokenProcessPool, unpicklable results, ...
+            return {'status': 'error', 'error': f"Worker failed: {e or type(e).__name__}"}
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # The rest of the oversized line is still unread, so the
+                    # stream cannot be resynchronized: answer and hang up
+                    response = {'status': 'error',
+                                'error': f"Request longer than {REQUEST_LIMIT} bytes"}
+                    writer.write(json.dumps(response).encode() + b'\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                response = await self._respond(line)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _claim_socket(self):
+        """Remove a stale socket file, refusing to replace a live daemon"""
+        if not os.path.exists(self.path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self.path)
+            except OSError:
+                os.unlink(self.path)
+                return
+        raise RuntimeError(f"A daemon is already listening on {self.path}")
+
+    async def serve(self, ready=None):
+        """Serve until SIGINT/SIGTERM; calls ready() once the socket accepts"""
+        self._claim_socket()
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(ValueError, RuntimeError):  # Not the main thread
+                loop.add_signal_handler(signum, stop.set)
+        self.stop = lambda: loop.call_soon_threadsafe(stop.set)
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_warm) as self.pool:
+            # Start (and warm) every worker before accepting requests
+            await asyncio.gather(*(loop.run_in_executor(self.pool, os.getpid)
+                                   for _ in range(self.workers)))
+            umask = os.umask(0o177)  # Socket is private to this user
+            try:
+                server = await asyncio.start_unix_server(self._connection, self.path,
+                                                         limit=REQUEST_LIMIT)
+            finally:
+                os.umask(umask)
+            try:
+                async with server:
+                    if ready:
+                        ready()
+                    await stop.wait()
+            finally:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self.path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="stego.py serve",
+        description="Serve encode/decode/probe requests on a Unix socket"
+    )
+    parser.add_argument("--socket", default=default_socket(),
+                      help=f"Socket path (default: {default_socket()})")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                      help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    daemon = Daemon(args.socket, args.workers)
+    try:
+        asyncio.run(daemon.serve(ready=lambda: print(
+            f"Listening on {args.socket} ({daemon.workers} workers)", file=sys.stderr, flush=True)))
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,26 @@
 #!/usr/bin/env python3
 """
 Complete Steganography GUI with Splash Screen
+
+Only Tk and the lightweight plugin registry load at startup; carriers
+(PIL, NumPy, PyPDF2), the crypto stack and the update checker are
+imported when first used, so the window is interactive almost at once.
+Options: --splash, --check-updates, --startup-time.
 """
 
+import time
+_START = time.perf_counter()
+
+import argparse
 import os
 import random
-import threading
+import sys
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, messagebox, ttk
-from PIL import Image, ImageTk
-import wave
-import struct
-from PyPDF2 import PdfReader, PdfWriter
-import requests
-from packaging import version
-import webbrowser
 import warnings
+import carriers
+from gui_worker import Cancelled, Job, thumbnail
 
 # Suppress warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -30,13 +35,99 @@ GITHUB_REPO = "yourusername/Steganography-Tool"
 HACKER_NAMES = [DEVELOPER_ALIAS] * 3 + [
     "PhantomSec", "ByteBandit", "CryptoGhost", "StealthVector"
 ]
+POLL_MS = 100              # How often the window checks on a running job
+UPDATE_CHECK_DELAY_MS = 2000  # --check-updates waits this long after startup
+STREAM_PIXELS = 1 << 22    # Images this large are processed in row strips
+FILE_TYPES = {".png": "image", ".bmp": "image", ".wav": "audio", ".pdf": "pdf"}
+STAGE_LABELS = {
+    "validate": "Validating",
+    "read": "Reading cover",
+    "compress": "Compressing",
+    "encrypt": "Encrypting",
+    "serialize": "Preparing payload",
+    "embed": "Embedding",
+    "rewrite": "Embedding",
+    "write": "Writing output",
+    "extract": "Extracting",
+    "decrypt": "Decrypting",
+    "decompress": "Decompressing",
+}
+
+# ======================
+# CARRIER JOBS (run on the worker thread)
+# ======================
+def _carrier_options(carrier, file_type, path, output_path=None):
+    """Process large images in strips: bounded memory and per-strip progress
+
+    Streaming keeps the cover's format, so an output named for another
+    format goes through the in-memory path, which converts it.
+    """
+    if file_type != "image":
+        return {}
+    img = carrier.validate_image(path, load=False)
+    if img.width * img.height < STREAM_PIXELS:
+        return {}
+    if output_path and os.path.splitext(output_path)[1].lower() != f".{img.format.lower()}":
+        return {}
+    from image_stream import open_strips
+    try:
+        open_strips(path, img)  # Header check: interlaced PNGs etc. cannot stream
+    except ValueError:
+        return {}
+    return {"streaming": True}
+
+def embed_job(file_type, input_path, message, output_path, encrypt):
+    """Encode with the carrier plugin; returns the generated key (or None)"""
+    carrier = carriers.get(file_type)
+    options = _carrier_options(carrier, file_type, input_path, output_path)
+    return carrier.embed(input_path, message, output_path, encrypt, **options)
+
+def extract_job(file_type, input_path, key):
+    """Decode with the carrier plugin; decrypts when a key is given"""
+    carrier = carriers.get(file_type)
+    options = _carrier_options(carrier, file_type, input_path)
+    return carrier.extract(input_path, bool(key), key, **options)
+
+def fetch_latest_release():
+    """Tag of the latest GitHub release (runs on a background thread)"""
+    import requests
+    
+    response = requests.get(
+        f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest",
+        timeout=3
+    )
+    response.raise_for_status()
+    return response.json()["tag_name"]
+
+def _open_url(url):
+    import webbrowser
+    webbrowser.open(url)
+
+def _format_seconds(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    return f"{seconds // 60:.0f} min {seconds % 60:02.0f} s"
 
 # ======================
 # SPLASH SCREEN
 # ======================
+def _gradient_image(width, height):
+    """The splash gradient as one image: a 1-pixel column, zoomed across"""
+    column = tk.PhotoImage(width=1, height=height)
+    rows = []
+    for i in range(height):
+        r = int(10 + (i/height)*100)
+        g = int(30 + (i/height)*100)
+        b = int(100 + (i/height)*155)
+        rows.append(f'{{#{r:02x}{g:02x}{b:02x}}}')
+    column.put(" ".join(rows))
+    return column.zoom(width, 1)
+
 class SplashScreen:
-    def __init__(self):
-        self.root = tk.Tk()
+    """Borderless splash over a (withdrawn) root, closed once the app is built"""
+
+    def __init__(self, master):
+        self.root = tk.Toplevel(master)
         self.root.overrideredirect(True)
         self.width, self.height = 500, 350
         
@@ -48,16 +139,13 @@ class SplashScreen:
         self.root.geometry(f"{self.width}x{self.height}+{x}+{y}")
         
         # Create canvas
-        self.canvas = tk.Canvas(self.root, width=self.width, height=self.height)
+        self.canvas = tk.Canvas(self.root, width=self.width, height=self.height,
+                                highlightthickness=0)
         self.canvas.pack()
         
         # Gradient background
-        for i in range(self.height):
-            r = int(10 + (i/self.height)*100)
-            g = int(30 + (i/self.height)*100)
-            b = int(100 + (i/self.height)*155)
-            color = f'#{r:02x}{g:02x}{b:02x}'
-            self.canvas.create_line(0, i, self.width, i, fill=color)
+        self.gradient = _gradient_image(self.width, self.height)
+        self.canvas.create_image(0, 0, image=self.gradient, anchor="nw")
         
         # App name
         self.canvas.create_text(
@@ -118,9 +206,9 @@ class SplashScreen:
             "Initializing steganography engine..."
         ]
         self.current_phrase = 0
+        self.pending = None
         
         self.animate()
-        self.root.after(3000, self.root.destroy)
     
     def animate(self):
         self.loading_pos += self.loading_speed
@@ -138,21 +226,31 @@ class SplashScreen:
             self.loading_pos, self.height*3//4 + 18
         )
         
-        if self.root.winfo_exists():
-            self.root.after(30, self.animate)
+        self.pending = self.root.after(30, self.animate)
     
-    def show(self):
-        self.root.mainloop()
+    def close(self):
+        if self.pending is not None:
+            self.root.after_cancel(self.pending)
+        self.root.destroy()
 
 # ======================
 # MAIN APPLICATION
 # ======================
 class StegoApp:
-    def __init__(self, root):
+    def __init__(self, root, check_updates=False):
         self.root = root
         self.key = None
+        self.job = None
+        self.job_mode = None
+        self.new_output = None  # Output file the running job creates
+        self.capacity = None    # Payload bytes the selected cover holds (None: unlimited)
+        self.preview_image = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stego-gui")
+        self.background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stego-background")
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         self.setup_ui()
-        threading.Thread(target=self.check_updates, daemon=True).start()
+        if check_updates:  # Opt-in, and only once the window is up
+            self.root.after(UPDATE_CHECK_DELAY_MS, self.check_updates, False)
     
     def setup_ui(self):
         self.root.title(f"{APP_NAME} {VERSION} :: {DEVELOPER_ALIAS}")
@@ -163,7 +261,7 @@ class StegoApp:
         
         # File menu
         filemenu = tk.Menu(menubar, tearoff=0)
-        filemenu.add_command(label="Exit", command=self.root.quit)
+        filemenu.add_command(label="Exit", command=self.close)
         menubar.add_cascade(label="File", menu=filemenu)
         
         # Help menu
@@ -203,13 +301,29 @@ class StegoApp:
         ttk.Label(mainframe, textvariable=self.input_path, 
                  wraplength=400).grid(row=2, column=1, columnspan=3, sticky="w")
         
+        # Cover preview
+        self.preview_label = ttk.Label(mainframe)
+        self.preview_label.grid(row=0, column=4, rowspan=6, padx=10, sticky="n")
+        
         # Message frame
         self.msg_frame = ttk.Frame(mainframe)
         ttk.Label(self.msg_frame, text="Secret Message:").pack(side="left")
-        self.message_entry = ttk.Entry(self.msg_frame, width=40)
+        self.message_var = tk.StringVar()
+        self.message_entry = ttk.Entry(self.msg_frame, width=40, textvariable=self.message_var)
         self.message_entry.pack(side="left", padx=5)
+        self.capacity_bar = ttk.Progressbar(self.msg_frame, length=120, maximum=100)
+        self.capacity_bar.pack(side="left", padx=5)
+        self.capacity_var = tk.StringVar()
+        ttk.Label(self.msg_frame, textvariable=self.capacity_var).pack(side="left")
         self.msg_frame.grid(row=3, column=0, columnspan=4, pady=10)
         
+        # Key frame (decode mode)
+        self.key_frame = ttk.Frame(mainframe)
+        ttk.Label(self.key_frame, text="Decryption Key:").pack(side="left")
+        self.key_entry = ttk.Entry(self.key_frame, width=48, show="*")
+        self.key_entry.pack(side="left", padx=5)
+        self.key_frame.grid(row=3, column=0, columnspan=4, pady=10)
+        
         # Output file
         self.output_button = ttk.Button(mainframe, text="Select Output File",
                                       command=self.select_output)
@@ -223,14 +337,23 @@ class StegoApp:
         ttk.Checkbutton(mainframe, text="Encrypt", 
                        variable=self.encrypt_var).grid(row=5, column=0, pady=10)
         
-        # Execute
-        ttk.Button(mainframe, text="Execute", 
-                  command=self.execute).grid(row=6, column=0, columnspan=4, pady=20)
+        # Execute / cancel
+        self.execute_button = ttk.Button(mainframe, text="Execute", command=self.execute)
+        self.execute_button.grid(row=6, column=0, columnspan=2, pady=20)
+        self.cancel_button = ttk.Button(mainframe, text="Cancel", command=self.cancel,
+                                        state="disabled")
+        self.cancel_button.grid(row=6, column=2, columnspan=2, pady=20)
+        
+        # Progress
+        self.progress = ttk.Progressbar(mainframe, length=400, maximum=100)
+        self.progress.grid(row=7, column=0, columnspan=4)
+        self.eta_var = tk.StringVar()
+        ttk.Label(mainframe, textvariable=self.eta_var).grid(row=8, column=0, columnspan=4)
         
         # Status
         self.status_var = tk.StringVar()
         ttk.Label(mainframe, textvariable=self.status_var,
-                 foreground="green").grid(row=7, column=0, columnspan=4)
+                 foreground="green").grid(row=9, column=0, columnspan=4)
         
         # Configure grid
         self.root.columnconfigure(0, weight=1)
@@ -240,6 +363,12 @@ class StegoApp:
         # Bind mode change
         self.mode_var.trace_add('write', self.update_ui)
         self.update_ui()
+        
+        # Capacity meter follows the message, encryption and cover type
+        self.message_var.trace_add('write', self.update_meter)
+        self.encrypt_var.trace_add('write', self.update_meter)
+        self.type_var.trace_add('write', self.reload_cover)
+        self.update_meter()
     
     def update_ui(self, *args):
         if not hasattr(self, 'msg_frame'):
@@ -247,9 +376,11 @@ class StegoApp:
             
         if self.mode_var.get() == "decode":
             self.msg_frame.grid_remove()
+            self.key_frame.grid()
             self.output_button.config(state="disabled")
         else:
             self.msg_frame.grid()
+            self.key_frame.grid_remove()
             self.output_button.config(state="normal")
     
     def select_input(self):
@@ -263,6 +394,63 @@ class StegoApp:
         if filename:
             self.input_path.set(filename)
             self.status_var.set(f"Selected: {os.path.basename(filename)}")
+            file_type = FILE_TYPES.get(os.path.splitext(filename)[1].lower())
+            if file_type and file_type != self.type_var.get():
+                self.type_var.set(file_type)  # Reloads the cover through the trace
+            else:
+                self.load_cover(filename)
+    
+    def reload_cover(self, *args):
+        if self.input_path.get():
+            self.load_cover(self.input_path.get())
+    
+    def load_cover(self, path):
+        """Read the cover's capacity from its header and start its preview
+
+        Only header metadata is read (image size, WAV frames and channels,
+        PDF trailer), so this is instant even for huge covers; the
+        thumbnail is decoded on a background thread.
+        """
+        try:
+            self.capacity = carriers.get(self.type_var.get()).capacity(path)
+        except Exception as e:
+            self.capacity = 0
+            self.status_var.set(f"Error: {str(e)}")
+        self.update_meter()
+        
+        self.preview_image = None
+        self.preview_label.config(image="")
+        if self.type_var.get() == "image" and self.capacity:
+            future = self.background.submit(thumbnail, path, os.stat(path).st_mtime_ns)
+            self.root.after(POLL_MS, self.show_preview, path, future)
+    
+    def show_preview(self, path, future):
+        if not future.done():
+            self.root.after(POLL_MS, self.show_preview, path, future)
+            return
+        if path != self.input_path.get() or future.exception() is not None:
+            return  # Another cover was picked meanwhile, or it cannot be previewed
+        from PIL import ImageTk
+        self.preview_image = ImageTk.PhotoImage(future.result())  # Keep a reference
+        self.preview_label.config(image=self.preview_image)
+    
+    def update_meter(self, *args):
+        """Show payload bytes used against the cover's capacity"""
+        if not hasattr(self, 'capacity_bar'):
+            return
+        used = len(self.message_var.get().encode())
+        if used and self.encrypt_var.get():
+            from utils import encrypted_size
+            used = encrypted_size(used)
+        
+        if not self.input_path.get() or self.capacity is None:
+            self.capacity_bar.config(value=0)
+            limit = " (no size limit)" if self.input_path.get() else ""
+            self.capacity_var.set(f"{used:,} bytes{limit}")
+            return
+        self.capacity_bar.config(value=min(used / self.capacity, 1) * 100 if self.capacity else 100)
+        over = " - too large for this cover" if used > self.capacity else ""
+        self.capacity_var.set(f"{used:,} / {self.capacity:,} bytes{over}")
     
     def select_output(self):
         default_ext = {
@@ -277,72 +465,113 @@ class StegoApp:
             self.status_var.set(f"Output: {os.path.basename(filename)}")
     
     def execute(self):
+        """Start the selected operation on the worker thread"""
+        if self.job is not None:
+            return
         try:
             if self.mode_var.get() == "encode":
-                self.encode_file()
+                job = self.encode_file()
             else:
-                result = self.decode_file()
-                messagebox.showinfo("Decoded Message", f"Hidden message:\n\n{result}")
-                
-            self.status_var.set("Operation completed successfully")
+                job = self.decode_file()
         except Exception as e:
             self.status_var.set(f"Error: {str(e)}")
             messagebox.showerror("Error", str(e))
+            return
+        
+        self.job = job.submit(self.executor)
+        self.job_mode = self.mode_var.get()
+        self.execute_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress.config(mode="indeterminate")
+        self.progress.start(15)
+        self.status_var.set("Working...")
+        self.root.after(POLL_MS, self.poll_job)
     
     def encode_file(self):
+        """Check the encode form and return the Job that performs it"""
         if not all([self.input_path.get(), self.output_path.get(), self.message_entry.get()]):
             raise ValueError("All fields are required for encoding")
         
-        message = self.message_entry.get()
-        if self.encrypt_var.get():
-            self.key = generate_key()
-            message = encrypt_message(message, self.key)
-            messagebox.showinfo("Encryption Key", 
-                              f"Save this key for decryption:\n\n{self.key}")
-        
-        file_type = self.type_var.get()
-        if file_type == "image":
-            self.encode_image()
-        elif file_type == "audio":
-            self.encode_audio()
-        elif file_type == "pdf":
-            self.encode_pdf()
+        output = self.output_path.get()
+        self.new_output = None if os.path.exists(output) else output
+        return Job(embed_job, self.type_var.get(), self.input_path.get(),
+                   self.message_entry.get(), output, self.encrypt_var.get())
     
     def decode_file(self):
+        """Check the decode form and return the Job that performs it"""
         if not self.input_path.get():
             raise ValueError("No input file selected")
         
-        file_type = self.type_var.get()
-        if file_type == "image":
-            return self.decode_image()
-        elif file_type == "audio":
-            return self.decode_audio()
-        elif file_type == "pdf":
-            return self.decode_pdf()
-    
-    def encode_image(self):
-        """Placeholder for image encoding"""
-        messagebox.showinfo("Info", "Image encoding would happen here")
+        key = self.key_entry.get().strip().encode() or None
+        if self.encrypt_var.get() and not key:
+            raise ValueError("Enter the decryption key")
+        self.new_output = None
+        return Job(extract_job, self.type_var.get(), self.input_path.get(), key)
     
-    def decode_image(self):
-        """Placeholder for image decoding"""
-        return "Sample decoded message from image"
-    
-    def encode_audio(self):
-        """Placeholder for audio encoding"""
-        messagebox.showinfo("Info", "Audio encoding would happen here")
+    def poll_job(self):
+        """Refresh progress while the job runs; report its outcome when done"""
+        job = self.job
+        if job is None:
+            return
+        if not job.done():
+            self.show_progress(job)
+            self.root.after(POLL_MS, self.poll_job)
+            return
+        
+        self.job = None
+        self.progress.stop()
+        self.progress.config(mode="determinate", value=0)
+        self.eta_var.set("")
+        self.execute_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+        try:
+            result = job.result()
+        except (Cancelled, Exception) as e:
+            if self.new_output and os.path.exists(self.new_output):
+                os.remove(self.new_output)  # Don't leave a half-written file behind
+            if isinstance(e, Cancelled):
+                self.status_var.set("Operation cancelled")
+            else:
+                self.status_var.set(f"Error: {str(e)}")
+                messagebox.showerror("Error", str(e))
+            return
+        
+        if self.job_mode == "encode":
+            if result:
+                self.key = result.decode()
+                messagebox.showinfo("Encryption Key",
+                                  f"Save this key for decryption:\n\n{self.key}")
+        else:
+            messagebox.showinfo("Decoded Message", f"Hidden message:\n\n{result}")
+        self.status_var.set("Operation completed successfully")
     
-    def decode_audio(self):
-        """Placeholder for audio decoding"""
-        return "Sample decoded message from audio"
+    def show_progress(self, job):
+        label = STAGE_LABELS.get(job.stage, "Working")
+        fraction = job.fraction
+        if fraction is None:
+            self.eta_var.set(f"{label}...")
+            return
+        if str(self.progress.cget("mode")) != "determinate":
+            self.progress.stop()
+            self.progress.config(mode="determinate")
+        self.progress.config(value=fraction * 100)
+        eta = job.eta()
+        self.eta_var.set(f"{label}... {fraction:.0%}" +
+                         (f", about {_format_seconds(eta)} left" if eta is not None else ""))
     
-    def encode_pdf(self):
-        """Placeholder for PDF encoding"""
-        messagebox.showinfo("Info", "PDF encoding would happen here")
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.cancel_button.config(state="disabled")
+            self.status_var.set("Cancelling...")
     
-    def decode_pdf(self):
-        """Placeholder for PDF decoding"""
-        return "Sample decoded message from PDF"
+    def close(self):
+        """Cancel any running job and close the window"""
+        if self.job is not None:
+            self.job.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.background.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
     
     def show_about(self):
         about = tk.Toplevel(self.root)
@@ -356,36 +585,74 @@ class StegoApp:
                 justify="center").pack(padx=20, pady=10)
         
         tk.Button(about, text="GitHub Repository", 
-                command=lambda: webbrowser.open(f"https://github.com/{GITHUB_REPO}")
+                command=lambda: _open_url(f"https://github.com/{GITHUB_REPO}")
                 ).pack(pady=10)
     
-    def check_updates(self):
+    def check_updates(self, manual=True):
+        """Look up the latest release off the Tk thread
+
+        The result is picked up by polling from the Tk thread, the only
+        thread allowed to show dialogs. Automatic checks stay silent when
+        the network is unreachable or the version is current.
+        """
+        future = self.background.submit(fetch_latest_release)
+        self.root.after(POLL_MS, self.updates_checked, future, manual)
+    
+    def updates_checked(self, future, manual):
+        if not future.done():
+            self.root.after(POLL_MS, self.updates_checked, future, manual)
+            return
         try:
-            response = requests.get(
-                f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest",
-                timeout=3
-            )
-            latest = response.json()["tag_name"]
-            if version.parse(latest) > version.parse(VERSION):
-                if messagebox.askyesno(
-                    "Update Available",
-                    f"New version {latest} available!\n\n"
-                    f"You have {VERSION}\n\n"
-                    "Would you like to download now?"
-                ):
-                    webbrowser.open(f"https://github.com/{GITHUB_REPO}/releases")
+            latest = future.result()
+            from packaging import version
+            newer = version.parse(latest) > version.parse(VERSION)
         except Exception:
-            messagebox.showerror("Error", "Could not check for updates")
+            if manual:
+                messagebox.showerror("Error", "Could not check for updates")
+            return
+        if newer:
+            if messagebox.askyesno(
+                "Update Available",
+                f"New version {latest} available!\n\n"
+                f"You have {VERSION}\n\n"
+                "Would you like to download now?"
+            ):
+                _open_url(f"https://github.com/{GITHUB_REPO}/releases")
+        elif manual:
+            messagebox.showinfo("Up to Date", f"{APP_NAME} {VERSION} is the latest version")
 
 # ======================
 # APPLICATION LAUNCH
 # ======================
-if __name__ == "__main__":
-    # Show splash screen
-    splash = SplashScreen()
-    splash.show()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"{APP_NAME} graphical interface")
+    parser.add_argument("--splash", action="store_true",
+                      help="Show the splash screen until the main window is ready")
+    parser.add_argument("--check-updates", action="store_true",
+                      help="Check GitHub for a newer release shortly after startup")
+    parser.add_argument("--startup-time", action="store_true",
+                      help="Print the milliseconds until the window is interactive, then exit")
+    args = parser.parse_args(argv)
     
-    # Create and run main application
     root = tk.Tk()
-    app = StegoApp(root)
+    splash = None
+    if args.splash:
+        root.withdraw()
+        splash = SplashScreen(root)
+        root.update()
+    
+    app = StegoApp(root, check_updates=args.check_updates)
+    
+    if splash is not None:
+        splash.close()
+        root.deiconify()
+    if args.startup_time:
+        root.update()  # Window mapped, drawn and handling events
+        print(f"{(time.perf_counter() - _START) * 1000:.1f}")
+        app.close()
+        return 0
     root.mainloop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
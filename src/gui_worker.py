@@ -0,0 +1,119 @@
+"""
+Background jobs for the GUI
+A Job runs one carrier operation on a worker thread. Its stage and
+progress callbacks (see profiling.py) update plain attributes that the Tk
+thread polls with after(), so the window never blocks and no Tk call is
+made off the main thread. Cover thumbnails are also built here, off the
+Tk thread. Nothing here imports Tk.
+"""
+
+import functools
+import threading
+import time
+import profiling
+
+THUMBNAIL_SIZE = (160, 160)
+
+class Cancelled(BaseException):
+    """Raised inside a job's worker thread once cancel() was requested
+
+    Like KeyboardInterrupt it is not an Exception, so the carriers' error
+    handling (which rewraps failures as ValueError) lets it through.
+    """
+
+class _JobObserver(profiling.Observer):
+    """Feeds one job's stage/progress state; ignores other threads' stages"""
+
+    def __init__(self, job, thread_id):
+        self.job = job
+        self.thread_id = thread_id
+
+    def start(self, name):
+        if threading.get_ident() == self.thread_id:
+            self.job._check()
+            self.job.stage = name
+
+    def progress(self, done, total):
+        if threading.get_ident() == self.thread_id:
+            self.job._check()
+            if total:
+                self.job._advance(min(done / total, 1.0))
+
+class Job:
+    """One operation submitted to an executor, with progress, ETA and cancel
+
+    stage is the most recent stage name and fraction the completed share
+    of the current loop (None until a loop reports progress).
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.stage = None
+        self.fraction = None
+        self._loop = None  # (time, fraction) of the current loop's first report
+        self.future = None
+        self._cancel = threading.Event()
+
+    def submit(self, executor):
+        self.future = executor.submit(self._run)
+        return self
+
+    def _run(self):
+        observer = _JobObserver(self, threading.get_ident())
+        profiling.add_observer(observer)
+        try:
+            self._check()
+            return self.func(*self.args, **self.kwargs)
+        finally:
+            profiling.remove_observer(observer)
+
+    def _advance(self, fraction):
+        if self.fraction is None or fraction < self.fraction:  # A new loop
+            self._loop = (time.monotonic(), fraction)
+        self.fraction = fraction
+
+    def _check(self):
+        if self._cancel.is_set():
+            raise Cancelled("Operation cancelled")
+
+    def cancel(self):
+        """Ask the job to stop at its next stage or progress callback"""
+        self._cancel.set()
+        if self.future is not None:
+            self.future.cancel()  # Not started yet: never runs
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def result(self):
+        """The operation's return value; raises its exception (or Cancelled)"""
+        if self.future.cancelled():
+            raise Cancelled("Operation cancelled")
+        return self.future.result()
+
+    def eta(self):
+        """Estimated seconds left in the current loop from its rate so far, or None"""
+        loop, fraction = self._loop, self.fraction
+        if loop is None or fraction is None or fraction <= loop[1]:
+            return None
+        return (time.monotonic() - loop[0]) * (1 - fraction) / (fraction - loop[1])
+
+@functools.lru_cache(maxsize=32)
+def thumbnail(path, mtime_ns, size=THUMBNAIL_SIZE):
+    """Downscaled RGB preview of an image, cached per file version
+
+    draft() lets formats that support it (JPEG) decode at reduced size;
+    thumbnail() then shrinks in steps instead of resampling the full image.
+    """
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.draft("RGB", size)
+        img.thumbnail(size, reducing_gap=2.0)
+        return img.convert("RGB")
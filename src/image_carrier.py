@@ -0,0 +1,218 @@
+"""
+Image carrier: payload bits in the low bits of PNG/BMP pixel channels
+"""
+
+import numpy as np
+from PIL import Image
+from bitcodec import bits_to_bytes, bytes_to_bits, embed_span, extract_lsb, span_entries, split_delimited
+from payload import (FLAG_CODEC, FLAG_CRC, FLAG_LAYOUT, MAX_HEADER_SIZE, build_header, finish_payload, frame_payload,
+                     header_size, prepare_payload, read_framed, read_header)
+from image_stream import StripReader, gather_strips, open_strips
+from scatter import ScatterOrder, resolve_key, scatter_reader, scatter_spans
+from profiling import stage
+
+NAME = 'image'
+EXTENSIONS = ('.png', '.bmp')
+LAYOUT_ALPHA = 0x10  # Layout byte: low nibble is the bits per channel
+
+def validate_image(filepath, load=True):
+    """Validate image file is supported format
+
+    With load=False only the header is read; the returned image has its
+    size, mode and tile layout but no pixel data.
+    """
+    try:
+        with Image.open(filepath) as img:
+            with stage('validate'):
+                if img.format not in ['PNG', 'BMP']:
+                    raise ValueError(f"Unsupported image format: {img.format}. Use PNG or BMP")
+            if load:
+                with stage('read', img.width * img.height * len(img.getbands())):
+                    img.load()  # Read pixels before the file is closed
+            return img
+    except Exception as e:
+        raise ValueError(f"Invalid image file: {str(e)}")
+
+def _pixel_array(img):
+    """Return image pixels as a writable (pixels, channels) uint8 array"""
+    if img.mode not in ('RGB', 'RGBA'):
+        raise ValueError(f"Unsupported image mode: {img.mode}. Use RGB or RGBA")
+    pixels = np.array(img, dtype=np.uint8)
+    return pixels.reshape(-1, pixels.shape[-1])
+
+def _image_spans(payload, depth, alpha, codec=None):
+    """Return the (first pixel, channels, depth, bits) spans to embed
+
+    The header always sits in the RGB LSBs from pixel 0 so decoders can
+    read it before knowing the layout. With the default layout the payload
+    follows it directly; otherwise it starts at the next whole pixel and
+    uses depth bits per channel, including alpha if requested.
+    """
+    if depth not in (1, 2, 3, 4):
+        raise ValueError("Bits per channel must be between 1 and 4")
+    if depth == 1 and not alpha:
+        return [(0, 3, 1, bytes_to_bits(frame_payload(payload, codec=codec)))]
+    
+    header = build_header(payload, layout=depth | (LAYOUT_ALPHA if alpha else 0), codec=codec).pack()
+    first = -(-len(header) * 8 // 3)
+    return [(0, 3, 1, bytes_to_bits(header)),
+            (first, 4 if alpha else 3, depth, bytes_to_bits(payload))]
+
+def image_capacity(width, height, depth=1, alpha=False, codec=False):
+    """Largest payload in bytes an image of this size holds with the given layout
+
+    codec=True counts the header byte of a compressed payload, which with
+    a non-default layout also moves the payload's first pixel.
+    """
+    pixels = width * height
+    flags = FLAG_CRC | (FLAG_CODEC if codec else 0)
+    if depth == 1 and not alpha:
+        return max(pixels * 3 // 8 - header_size(flags), 0)
+    first = -(-header_size(flags | FLAG_LAYOUT) * 8 // 3)
+    return max((pixels - first) * (4 if alpha else 3) * depth // 8, 0)
+
+def _lsb_reader(prefix, first, channels, depth):
+    """Return read_bytes(offset, count) over the low bits of pixels[first:, :channels]
+
+    prefix(count) returns an array holding at least the first count pixels,
+    so only the pixels carrying the requested bytes are examined.
+    """
+    def read_bytes(offset, count):
+        start, stop = offset * 8, (offset + count) * 8
+        pixels = prefix(first + -(-stop // (channels * depth)))
+        return bits_to_bytes(extract_lsb(pixels[first:, :channels], start, stop, depth))
+    return read_bytes
+
+def _image_payload(prefix, bands, order=None, fetch=None):
+    """Read the payload through a pixel prefix function, falling back to the delimiter
+
+    With a scatter order, pixels are read through fetch(pixel indices)
+    instead. Returns (payload, codec).
+    """
+    def reader(first, channels, depth, readahead=0):
+        if order is None:
+            return _lsb_reader(prefix, first, channels, depth)
+        return scatter_reader(order, first, channels, depth, fetch, readahead)
+    
+    header_reader = reader(0, 3, 1, MAX_HEADER_SIZE)
+    
+    def locate(header):
+        if header.layout is None:
+            return lambda offset, count: header_reader(header.size + offset, count)
+        depth, alpha = header.layout & 0x0F, bool(header.layout & LAYOUT_ALPHA)
+        if alpha and bands < 4:
+            raise ValueError("Payload uses the alpha channel but the image has none")
+        return reader(-(-header.size * 8 // 3), 4 if alpha else 3, depth)
+    
+    framed = read_framed(header_reader, locate)
+    if framed is None and order is not None:
+        raise ValueError("No payload found (wrong scatter passphrase?)")
+    if framed is None:  # Legacy delimiter format
+        return split_delimited((prefix(None)[:, :3] & 1).reshape(-1)), None
+    header, payload = framed
+    return payload, header.codec
+
+def encode_image(image_path, secret_msg, output_path, encrypt=False, streaming=False,
+                 depth=1, alpha=False, recipients=None, compress=None, scatter=None):
+    """Hide message in image with validation
+
+    depth sets the bits stored per channel (1-4) and alpha=True also uses
+    the alpha channel of RGBA covers; both are recorded in the payload
+    header, as is the compression codec when compress is 'zlib', 'lzma' or
+    'auto'. With streaming=True the cover is processed in row strips and
+    only the strips carrying the payload are rewritten; the output keeps
+    the cover's format (PNG or BMP). With scatter (a passphrase, or True
+    for the encryption key) pixels are used in a keyed pseudo-random order
+    instead of from the top (see scatter.py). Returns the generated key
+    when encrypt=True.
+    """
+    img = validate_image(image_path, load=not streaming)
+    if alpha and img.mode != 'RGBA':
+        raise ValueError("Alpha embedding needs an RGBA image")
+    
+    payload, key, codec = prepare_payload(secret_msg, encrypt, recipients, compress)
+    with stage('serialize', len(payload)):
+        spans = _image_spans(payload, depth, alpha, codec)
+    
+    pixel_count = img.width * img.height
+    if any(first + span_entries(bits, channels, d) > pixel_count
+           for first, channels, d, bits in spans):
+        max_chars = image_capacity(img.width, img.height, depth, alpha, bool(codec))
+        raise ValueError(f"Message too large for image (max: {max_chars} chars)")
+    if scatter:
+        with stage('scatter'):
+            spans = scatter_spans(spans, ScatterOrder(resolve_key(scatter, key), pixel_count))
+    
+    if streaming:
+        with stage('rewrite'):  # Strips are read, patched and written in one pass
+            open_strips(image_path, img).encode(spans, output_path)
+        return key
+    
+    with stage('embed', len(payload)):
+        pixels = _pixel_array(img)
+        for span in spans:
+            embed_span(pixels, span)
+    
+    with stage('write', pixels.nbytes):
+        new_img = Image.fromarray(pixels.reshape(img.height, img.width, -1))
+        new_img.save(output_path)
+    return key
+
+def decode_image(image_path, decrypt=False, key=None, streaming=False, scatter=None):
+    """Extract message from image with validation
+
+    The embedding layout is read from the payload header. With
+    streaming=True strips are decoded only until the payload is complete
+    (with scatter, in one pass for the header and one for the payload).
+    scatter must match the encoder's.
+    """
+    img = validate_image(image_path, load=not streaming)
+    order = ScatterOrder(resolve_key(scatter, key), img.width * img.height) if scatter else None
+    bands = len(img.getbands())
+    
+    with stage('extract') as extract:
+        if streaming:
+            source = open_strips(image_path, img)
+            payload, codec = _image_payload(StripReader(source.strips()).prefix, bands, order,
+                                            lambda rows: gather_strips(source, rows))
+        else:
+            pixels = _pixel_array(img)
+            payload, codec = _image_payload(lambda count: pixels, bands, order,
+                                            lambda rows: pixels[rows])
+        extract.nbytes = len(payload)
+    return finish_payload(payload, decrypt, key, codec)
+
+def capacity(path, depth=1, alpha=False):
+    """Largest payload in bytes the cover at path holds, reading only its header"""
+    img = validate_image(path, load=False)
+    return image_capacity(img.width, img.height, depth, alpha)
+
+def detect(path):
+    """Return the payload header if the image carries a framed payload, else None
+
+    Only the pixels holding the header are decoded: the first row of
+    covers the streaming engine supports, the whole image otherwise.
+    Scattered and legacy delimiter payloads are not recognized.
+    """
+    img = validate_image(path, load=False)
+    if img.mode not in ('RGB', 'RGBA'):
+        return None
+    try:
+        prefix = StripReader(open_strips(path, img).strips(strip_rows=1)).prefix
+    except ValueError:  # Interlaced PNG and the like
+        pixels = _pixel_array(validate_image(path))
+        prefix = lambda count: pixels
+    header = read_header(_lsb_reader(prefix, 0, 3, 1))
+    if header is None or header.length > image_capacity(img.width, img.height, 4, img.mode == 'RGBA'):
+        return None  # A chance match of the magic
+    return header
+
+embed = encode_image
+extract = decode_image
+
+def cli_options(args, encode):
+    """Carrier-specific keyword arguments for embed/extract from parsed CLI arguments"""
+    if encode:
+        return {'streaming': args.stream, 'depth': args.depth, 'alpha': args.alpha,
+                'scatter': args.scatter}
+    return {'streaming': args.stream, 'scatter': args.scatter}
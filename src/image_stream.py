@@ -0,0 +1,290 @@
+"""
+Strip-based streaming engine for very large PNG/BMP covers
+Pixels are decoded and rewritten a strip of rows at a time, so peak memory
+depends on the strip size rather than the image size, and only the strips
+that carry payload bits are touched.
+"""
+
+import shutil
+import struct
+import zlib
+import numpy as np
+from bitcodec import embed_span, span_end
+from profiling import progress, stage
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+STRIP_BYTES = 4 << 20   # Target decoded size of one strip
+IDAT_SIZE = 1 << 16     # Size of the IDAT chunks we write
+
+def _rows_per_strip(row_size, strip_rows):
+    return strip_rows or max(1, STRIP_BYTES // row_size)
+
+def _touched_rows(spans, width):
+    """Number of leading image rows that carry payload bits"""
+    return -(-max(span_end(span) for span in spans) // width)
+
+def _check_output(output_path, extension, fmt):
+    """Streaming copies the cover's encoding, so the output must be named for it"""
+    if not output_path.lower().endswith(extension):
+        raise ValueError(f"Streaming keeps the cover's {fmt} format; use a {extension} output path")
+
+def _embed_strip(pixels, first_pixel, spans):
+    """Embed the parts of each (first pixel, channels, depth, bits) span that fall into a strip"""
+    with stage('embed', pixels.nbytes):
+        for span in spans:
+            embed_span(pixels, span, first_pixel)
+
+def _unfilter(ftype, line, prev, bpp):
+    """Undo PNG scanline filtering for one row"""
+    if ftype == 0:
+        return line
+    if ftype == 1:
+        return np.cumsum(line.reshape(-1, bpp), axis=0, dtype=np.uint8).reshape(-1)
+    if ftype == 2:
+        return line + prev
+
+    if ftype not in (3, 4):
+        raise ValueError(f"Invalid PNG filter type: {ftype}")
+
+    # Average and Paeth depend on the reconstructed left neighbour, which
+    # NumPy cannot vectorize; hand the row and its predecessor to PIL's
+    # C decoder as a two-row PNG stream (stored, so zlib only copies)
+    from PIL import Image
+
+    mode = 'RGB' if bpp == 3 else 'RGBA'
+    data = zlib.compress(b'\x00' + prev.tobytes() + bytes([ftype]) + line.tobytes(), 0)
+    rows = Image.frombytes(mode, (len(line) // bpp, 2), data, 'zip', mode)
+    return np.frombuffer(rows.tobytes(), dtype=np.uint8)[len(line):]
+
+def _write_chunk(out, ctype, data):
+    out.write(struct.pack('>I', len(data)) + ctype)
+    out.write(data)
+    out.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(ctype))))
+
+class PngStrips:
+    """Row-strip access to a non-interlaced 8-bit RGB/RGBA PNG"""
+
+    def __init__(self, path):
+        self.path = path
+        self.chunks = []  # (type, data offset, length)
+        with open(path, 'rb') as f:
+            if f.read(8) != PNG_SIGNATURE:
+                raise ValueError("Not a PNG file")
+            while True:
+                head = f.read(8)
+                if len(head) < 8:
+                    break
+                length, ctype = struct.unpack('>I4s', head)
+                self.chunks.append((ctype, f.tell(), length))
+                if ctype == b'IHDR':
+                    ihdr = f.read(length)
+                    f.seek(4, 1)
+                else:
+                    f.seek(length + 4, 1)
+                if ctype == b'IEND':
+                    break
+
+        self.width, self.height, depth, color, _, _, interlace = struct.unpack('>IIBBBBB', ihdr)
+        if depth != 8 or color not in (2, 6) or interlace:
+            raise ValueError("Streaming mode needs a non-interlaced 8-bit RGB or RGBA PNG")
+        self.channels = 3 if color == 2 else 4
+        self.row_size = self.width * self.channels
+
+    def _scanlines(self, f):
+        """Yield (filter type, filtered row) for each scanline, decompressing lazily"""
+        stride = self.row_size + 1
+        decompressor = zlib.decompressobj()
+        buffer = bytearray()
+        for ctype, offset, length in self.chunks:
+            if ctype != b'IDAT':
+                continue
+            f.seek(offset)
+            data = f.read(length)
+            while data:
+                buffer += decompressor.decompress(data, STRIP_BYTES)
+                rows = len(buffer) // stride
+                for i in range(rows):
+                    line = buffer[i * stride:(i + 1) * stride]
+                    yield line[0], np.frombuffer(line, dtype=np.uint8, offset=1)
+                del buffer[:rows * stride]
+                data = decompressor.unconsumed_tail
+
+    def strips(self, strip_rows=None):
+        """Yield (first pixel, (pixels, channels) array) for each strip, top to bottom"""
+        rows_per_strip = _rows_per_strip(self.row_size, strip_rows)
+        prev = np.zeros(self.row_size, dtype=np.uint8)
+        strip = []
+        first_row = 0
+        with open(self.path, 'rb') as f:
+            for ftype, line in self._scanlines(f):
+                prev = _unfilter(ftype, line, prev, self.channels)
+                strip.append(prev)
+                if len(strip) == rows_per_strip:
+                    yield first_row * self.width, np.stack(strip).reshape(-1, self.channels)
+                    first_row += len(strip)
+                    strip = []
+                    progress(first_row, self.height)
+        if strip:
+            yield first_row * self.width, np.stack(strip).reshape(-1, self.channels)
+
+    def encode(self, spans, output_path, strip_rows=None):
+        """Write a copy of the PNG with spans embedded, re-encoding only touched rows
+
+        Touched rows and the row after them are stored unfiltered; every
+        later scanline is passed through with its original filter bytes.
+        """
+        _check_output(output_path, '.png', 'PNG')
+        rows_per_strip = _rows_per_strip(self.row_size, strip_rows)
+        touched = _touched_rows(spans, self.width)
+        rewrite = min(touched + 1, self.height)
+
+        with open(self.path, 'rb') as f, open(output_path, 'wb') as out:
+            out.write(PNG_SIGNATURE)
+            idat_written = False
+            for ctype, offset, length in self.chunks:
+                if ctype != b'IDAT':
+                    f.seek(offset - 8)
+                    out.write(f.read(length + 12))
+                elif not idat_written:
+                    self._write_idat(f, out, spans, rewrite, rows_per_strip)
+                    idat_written = True
+
+    def _write_idat(self, f, out, spans, rewrite, rows_per_strip):
+        compressor = zlib.compressobj(6)
+        pending = bytearray()
+        prev = np.zeros(self.row_size, dtype=np.uint8)
+        strip = []
+        row = 0
+
+        def emit(data):
+            pending.extend(compressor.compress(data))
+            while len(pending) >= IDAT_SIZE:
+                _write_chunk(out, b'IDAT', bytes(pending[:IDAT_SIZE]))
+                del pending[:IDAT_SIZE]
+
+        def flush_strip():
+            first_row = row - len(strip)
+            pixels = np.stack(strip).reshape(-1, self.channels)
+            _embed_strip(pixels, first_row * self.width, spans)
+            for line in pixels.reshape(len(strip), -1):
+                emit(b'\x00' + line.tobytes())
+            strip.clear()
+
+        for scanned, (ftype, line) in enumerate(self._scanlines(f), 1):
+            if row < rewrite:
+                prev = _unfilter(ftype, line, prev, self.channels)
+                strip.append(prev)
+                row += 1
+                if len(strip) == rows_per_strip or row == rewrite:
+                    flush_strip()
+            else:
+                emit(bytes([ftype]) + line.tobytes())
+            if scanned % rows_per_strip == 0:
+                progress(scanned, self.height)
+
+        pending.extend(compressor.flush())
+        for start in range(0, len(pending), IDAT_SIZE):
+            _write_chunk(out, b'IDAT', bytes(pending[start:start + IDAT_SIZE]))
+
+class BmpStrips:
+    """Row-strip access to an uncompressed BMP via its raw pixel layout"""
+
+    def __init__(self, path, img):
+        self.path = path
+        codec, _, self.offset, args = img.tile[0]
+        rawmode, stride, orientation = args
+        if codec != 'raw' or len(img.tile) != 1 or not set(rawmode) <= set('BGRXA'):
+            raise ValueError("Streaming mode needs an uncompressed 24/32-bit BMP")
+        self.width, self.height = img.size
+        self.bpp = len(rawmode)
+        self.stride = stride or self.width * self.bpp
+        self.bottom_up = orientation < 0
+        self.order = [rawmode.index(c) for c in img.mode]  # raw byte index of R, G, B(, A)
+        self.channels = len(self.order)
+        self.row_size = self.width * self.channels
+
+    def _block(self, f, row, count):
+        """Read image rows [row, row + count)
+
+        Returns the file offset, the raw (count, stride) block and a
+        (count, width, bpp) top-down view into it.
+        """
+        first = self.height - row - count if self.bottom_up else row
+        offset = self.offset + first * self.stride
+        f.seek(offset)
+        block = np.frombuffer(bytearray(f.read(count * self.stride)), dtype=np.uint8)
+        block = block.reshape(count, self.stride)
+        raw = block[:, :self.width * self.bpp].reshape(count, self.width, self.bpp)
+        return offset, block, raw[::-1] if self.bottom_up else raw
+
+    def strips(self, strip_rows=None):
+        """Yield (first pixel, (pixels, channels) array) for each strip, top to bottom"""
+        rows_per_strip = _rows_per_strip(self.row_size, strip_rows)
+        with open(self.path, 'rb') as f:
+            for row in range(0, self.height, rows_per_strip):
+                count = min(rows_per_strip, self.height - row)
+                _, _, raw = self._block(f, row, count)
+                yield row * self.width, raw[:, :, self.order].reshape(-1, self.channels)
+                progress(row + count, self.height)
+
+    def encode(self, spans, output_path, strip_rows=None):
+        """Copy the BMP and patch only the rows that carry payload bits in place"""
+        _check_output(output_path, '.bmp', 'BMP')
+        rows_per_strip = _rows_per_strip(self.row_size, strip_rows)
+        touched = _touched_rows(spans, self.width)
+        shutil.copyfile(self.path, output_path)
+        with open(output_path, 'r+b') as f:
+            for row in range(0, touched, rows_per_strip):
+                count = min(rows_per_strip, touched - row)
+                offset, block, raw = self._block(f, row, count)
+                pixels = raw[:, :, self.order].reshape(-1, self.channels)
+                _embed_strip(pixels, row * self.width, spans)
+                raw[:, :, self.order] = pixels.reshape(count, self.width, self.channels)
+                f.seek(offset)
+                f.write(block.tobytes())
+                progress(row + count, touched)
+
+def gather_strips(source, rows):
+    """Pixels at rows (any order) from one top-to-bottom pass over a strip source
+
+    Decoding stops after the strip holding the last requested pixel.
+    """
+    ranks = np.argsort(rows)
+    ordered = rows[ranks]
+    out = None
+    for first_pixel, pixels in source.strips():
+        if out is None:
+            out = np.empty((len(rows), pixels.shape[1]), dtype=np.uint8)
+        lo, hi = np.searchsorted(ordered, (first_pixel, first_pixel + len(pixels)))
+        out[ranks[lo:hi]] = pixels[ordered[lo:hi] - first_pixel]
+        if hi == len(ordered):
+            break
+    return out
+
+def open_strips(image_path, img):
+    """Return the strip source for a validated (header-only) image"""
+    if img.format == 'PNG':
+        return PngStrips(image_path)
+    return BmpStrips(image_path, img)
+
+class StripReader:
+    """Growing pixel prefix of a strip source, decoding strips only on demand"""
+
+    def __init__(self, strips):
+        self.strips = strips
+        self.pixels = None
+        self.parts = []
+        self.count = 0
+
+    def prefix(self, count=None):
+        """Return at least the first count pixels (all pixels when count is None)"""
+        while count is None or self.count < count:
+            _, pixels = next(self.strips, (None, None))
+            if pixels is None:
+                break
+            self.parts.append(pixels)
+            self.count += len(pixels)
+        if len(self.parts) > 1 or self.pixels is None:
+            self.pixels = np.concatenate(self.parts)
+            self.parts = [self.pixels]
+        return self.pixels
@@ -0,0 +1,265 @@
+"""
+Versioned payload header written ahead of the embedded data
+
+Layout (big-endian):
+    magic     3 bytes   b'\\x89PV'
+    version   1 byte
+    flags     1 byte    FLAG_* bit field
+    length    4 bytes   payload length in bytes
+    optional fields, in table order, present only when their flag is set:
+    crc32     4 bytes   FLAG_CRC
+    layout    1 byte    FLAG_LAYOUT  carrier-specific embedding layout
+    codec     1 byte    FLAG_CODEC   CODEC_* compression applied before encryption
+"""
+
+import lzma
+import struct
+import zlib
+from dataclasses import dataclass
+from profiling import stage
+
+MAGIC = b'\x89PV'
+VERSION = 1
+
+FLAG_CRC = 0x01
+FLAG_LAYOUT = 0x02
+FLAG_CODEC = 0x04
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODECS = {'zlib': CODEC_ZLIB, 'lzma': CODEC_LZMA}
+CODEC_CHUNK = 1 << 16  # Compressed bytes fed to the decompressor at a time
+LZMA_MIN_SIZE = 64     # The .xz container alone takes ~60 bytes; 'auto' skips lzma below this
+LZMA_DICT_RANGE = (1 << 12, 1 << 23)  # LZMA2 minimum up to the dictionary of preset 6
+
+_FIXED = struct.Struct('>3sBBI')
+FIXED_SIZE = _FIXED.size
+
+# (flag, attribute, encoding) for every optional field, in on-disk order
+_OPTIONAL_FIELDS = [
+    (FLAG_CRC, 'crc', struct.Struct('>I')),
+    (FLAG_LAYOUT, 'layout', struct.Struct('>B')),
+    (FLAG_CODEC, 'codec', struct.Struct('>B')),
+]
+
+@dataclass
+class PayloadHeader:
+    length: int
+    flags: int = 0
+    crc: int = None
+    layout: int = None
+    codec: int = None
+
+    @property
+    def size(self):
+        """Number of header bytes, including optional fields"""
+        return header_size(self.flags)
+
+    def pack(self):
+        """Serialize the header to bytes"""
+        data = _FIXED.pack(MAGIC, VERSION, self.flags, self.length)
+        for flag, name, field in _OPTIONAL_FIELDS:
+            if self.flags & flag:
+                data += field.pack(getattr(self, name))
+        return data
+
+    def verify(self, payload):
+        """Raise ValueError if the payload does not match the stored checksum"""
+        if self.flags & FLAG_CRC and zlib.crc32(payload) != self.crc:
+            raise ValueError("Payload checksum mismatch (corrupted or modified carrier)")
+
+def to_bytes(message):
+    """Return message as bytes, UTF-8 encoding text"""
+    if isinstance(message, str):
+        return message.encode('utf-8')
+    return bytes(message)
+
+def to_text(data):
+    """Decode payload bytes as UTF-8, falling back to Latin-1 for old files"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+def header_size(flags):
+    """Size in bytes of a header carrying the given flags"""
+    return FIXED_SIZE + sum(field.size for flag, _, field in _OPTIONAL_FIELDS if flags & flag)
+
+MAX_HEADER_SIZE = header_size(sum(flag for flag, _, _ in _OPTIONAL_FIELDS))
+
+def build_header(payload, crc=True, layout=None, codec=None):
+    """Return the header for payload"""
+    if len(payload) > 0xFFFFFFFF:
+        raise ValueError("Payload too large (max 4 GiB)")
+    header = PayloadHeader(len(payload))
+    if crc:
+        header.flags |= FLAG_CRC
+        header.crc = zlib.crc32(payload)
+    if layout is not None:
+        header.flags |= FLAG_LAYOUT
+        header.layout = layout
+    if codec:
+        header.flags |= FLAG_CODEC
+        header.codec = codec
+    return header
+
+def read_header(read_bytes):
+    """Parse a header through read_bytes(offset, count)
+
+    Returns None when the data does not start with the header magic, so
+    callers can fall back to the legacy delimiter format.
+    """
+    fixed = read_bytes(0, FIXED_SIZE)
+    if len(fixed) < FIXED_SIZE:
+        return None
+    magic, version, flags, length = _FIXED.unpack(fixed)
+    if magic != MAGIC:
+        return None
+    if version != VERSION:
+        raise ValueError(f"Unsupported payload version: {version}")
+
+    header = PayloadHeader(length, flags)
+    extra = read_bytes(FIXED_SIZE, header.size - FIXED_SIZE)
+    if len(extra) < header.size - FIXED_SIZE:
+        raise ValueError("Truncated payload header")
+    offset = 0
+    for flag, name, field in _OPTIONAL_FIELDS:
+        if flags & flag:
+            setattr(header, name, field.unpack_from(extra, offset)[0])
+            offset += field.size
+    return header
+
+def read_framed(read_bytes, locate=None):
+    """Read and verify a header-framed payload through read_bytes(offset, count)
+
+    By default the payload directly follows the header. Carriers that place
+    it elsewhere pass locate(header), returning a read_bytes function whose
+    offsets are relative to the payload start. Only header.size +
+    header.length bytes are requested. Returns (header, payload), or None
+    when no header is present.
+    """
+    header = read_header(read_bytes)
+    if header is None:
+        return None
+    if locate is None:
+        payload = read_bytes(header.size, header.length)
+    else:
+        payload = locate(header)(0, header.length)
+    if len(payload) < header.length:
+        raise ValueError("Payload truncated: carrier is smaller than the header claims")
+    header.verify(payload)
+    return header, payload
+
+def read_payload(read_bytes, locate=None):
+    """Like read_framed, returning only the payload (or None)"""
+    framed = read_framed(read_bytes, locate)
+    return framed and framed[1]
+
+def frame_payload(payload, crc=True, layout=None, codec=None):
+    """Return header + payload, ready to embed"""
+    return build_header(payload, crc, layout, codec).pack() + payload
+
+def compress_payload(data, method):
+    """Compress data with 'zlib', 'lzma' or 'auto'; returns (codec, data)
+
+    'auto' keeps whichever of the raw data and both codecs is smallest, so
+    incompressible payloads are stored as they are (CODEC_NONE). The lzma
+    dictionary is sized to the payload: preset 6 allocates ~100 MB for its
+    8 MiB dictionary, however short the message.
+    """
+    if method == 'auto':
+        names = [name for name in CODECS if name != 'lzma' or len(data) >= LZMA_MIN_SIZE]
+        candidates = [(CODEC_NONE, data)] + [compress_payload(data, name) for name in names]
+        return min(candidates, key=lambda candidate: len(candidate[1]))
+    if method == 'zlib':
+        return CODEC_ZLIB, zlib.compress(data, 9)
+    if method == 'lzma':
+        low, high = LZMA_DICT_RANGE
+        dict_size = min(max(len(data), low), high)
+        filters = [{'id': lzma.FILTER_LZMA2, 'preset': 6, 'dict_size': dict_size}]
+        return CODEC_LZMA, lzma.compress(data, filters=filters)
+    raise ValueError(f"Unknown compression method: {method}")
+
+def decompress_stream(chunks, codec):
+    """Yield the decompressed data of an iterable of compressed chunks"""
+    if not codec:
+        yield from chunks
+        return
+    if codec == CODEC_ZLIB:
+        decompressor = zlib.decompressobj()
+    elif codec == CODEC_LZMA:
+        decompressor = lzma.LZMADecompressor()
+    else:
+        raise ValueError(f"Unsupported payload codec: {codec}")
+    try:
+        for chunk in chunks:
+            yield decompressor.decompress(chunk)
+        if codec == CODEC_ZLIB:
+            yield decompressor.flush()
+        if not decompressor.eof:
+            raise ValueError("Compressed payload is truncated")
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"Payload could not be decompressed (encrypted? wrong key?): {e}") from None
+
+def decompress_payload(data, codec):
+    """Decompress a whole payload, feeding the decompressor CODEC_CHUNK bytes at a time"""
+    if not codec:
+        return data
+    chunks = (data[pos:pos + CODEC_CHUNK] for pos in range(0, len(data), CODEC_CHUNK))
+    return b''.join(decompress_stream(chunks, codec))
+
+class ChunkReader:
+    """read_bytes(offset, count) over an iterable of byte chunks, consumed on demand"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buffer = bytearray()
+
+    def __call__(self, offset, count):
+        while len(self.buffer) < offset + count:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        return bytes(self.buffer[offset:offset + count])
+
+def prepare_payload(secret_msg, encrypt, recipients=None, compress=None):
+    """Return (payload bytes, key, codec) for a message
+
+    The message is first compressed if compress names a method ('zlib',
+    'lzma' or 'auto'), then encrypted with a fresh key if requested. With
+    recipients (RSA public keys) it is sealed in a multi-recipient envelope
+    instead and no key is returned. The crypto libraries are imported only
+    when encrypting.
+    """
+    data = to_bytes(secret_msg)
+    codec = None
+    if compress:
+        with stage('compress', len(data)):
+            codec, data = compress_payload(data, compress)
+    key = None
+    if recipients:
+        from utils import encrypt_envelope
+        with stage('encrypt', len(data)):
+            data = encrypt_envelope(data, recipients)
+    elif encrypt:
+        from utils import encrypt_message, generate_key
+        key = generate_key()
+        print(f"ENCRYPTION KEY (SAVE THIS): {key.decode()}")
+        with stage('encrypt', len(data)):
+            data = encrypt_message(data, key)
+    return data, key, codec
+
+def finish_payload(payload, decrypt, key, codec=None):
+    """Turn extracted payload bytes back into the message text"""
+    if decrypt:
+        from utils import decrypt_payload
+        if not key:
+            key = input("Enter encryption key: ").encode()
+        with stage('decrypt', len(payload)):
+            payload = decrypt_payload(payload, key)
+    if codec:
+        with stage('decompress', len(payload)):
+            payload = decompress_payload(payload, codec)
+    return to_text(payload)
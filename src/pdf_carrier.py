@@ -0,0 +1,124 @@
+"""
+PDF carrier: messages in the document Info dictionary or in a compressed
+stream object it references, written as incremental updates
+"""
+
+from PyPDF2 import PdfReader, PdfWriter
+from payload import (ChunkReader, PayloadHeader, build_header, finish_payload, prepare_payload,
+                     read_framed, read_header, to_bytes, to_text)
+from pdf_io import LazyPdfReader, append_info
+from profiling import stage
+
+NAME = 'pdf'
+EXTENSIONS = ('.pdf',)
+PDF_MESSAGE_KEY = '/HiddenMessage'  # Info entry holding a metadata-mode message
+PDF_PAYLOAD_KEY = '/HiddenPayload'  # Info entry referencing a stream-mode payload
+
+def validate_pdf(filepath):
+    """Validate PDF is not password protected
+
+    Returns the open LazyPdfReader (only the trailer has been parsed) so
+    the caller can reuse it; its page_count comes from the page tree root.
+    """
+    reader = None
+    try:
+        with stage('validate'):
+            reader = LazyPdfReader(filepath)
+            if reader.is_encrypted:
+                raise ValueError("Encrypted PDFs are not supported")
+        return reader
+    except Exception as e:
+        if reader is not None:
+            reader.close()
+        raise ValueError(f"Invalid PDF file: {str(e)}")
+
+def encode_pdf(pdf_path, secret_msg, output_path, encrypt=False, mode='metadata', incremental=True,
+               recipients=None, compress=None):
+    """Hide message in PDF metadata or in a compressed stream object
+
+    mode='metadata' stores the text as /HiddenMessage in the Info
+    dictionary. mode='stream' (implied by encryption and compression)
+    stores the header-framed payload, which may be binary, as a FlateDecode
+    stream referenced from Info as /HiddenPayload.
+
+    By default the message is added as an incremental update: the original
+    bytes are copied unchanged and only the new objects, an xref section and
+    a trailer are appended. incremental=False rewrites the whole document
+    first. Returns the generated key when encrypting.
+    """
+    key = None
+    if encrypt or recipients or compress or mode == 'stream':
+        payload, key, codec = prepare_payload(secret_msg, encrypt, recipients, compress)
+        updates = {PDF_MESSAGE_KEY: None}
+        streams = {PDF_PAYLOAD_KEY: [build_header(payload, codec=codec).pack(), payload]}
+    else:
+        updates = {PDF_MESSAGE_KEY: to_text(to_bytes(secret_msg)), PDF_PAYLOAD_KEY: None}
+        streams = None
+    updates['/Creator'] = 'Steganography Tool'
+    
+    with validate_pdf(pdf_path) as reader:
+        if incremental:
+            with stage('write'):
+                append_info(pdf_path, updates, output_path, reader, streams)
+            return key
+        
+        with stage('read'):
+            full_reader = PdfReader(reader.stream)
+            writer = PdfWriter()
+            for page in full_reader.pages:
+                writer.add_page(page)
+            if full_reader.metadata:
+                writer.add_metadata(full_reader.metadata)
+        
+        with stage('write'), open(output_path, 'wb') as f:
+            writer.write(f)
+    
+    with stage('write'):
+        append_info(output_path, updates, None, None, streams)
+    return key
+
+def decode_pdf(pdf_path, decrypt=False, key=None):
+    """Extract message from PDF metadata or its payload stream
+
+    Only the trailer, the Info dictionary and (in stream mode) the one
+    referenced stream are read; the stream is inflated chunk by chunk.
+    """
+    with validate_pdf(pdf_path) as reader:
+        metadata = reader.metadata or {}
+        if PDF_PAYLOAD_KEY in metadata:
+            with stage('extract') as extract:
+                read_bytes = ChunkReader(reader.iter_stream(metadata.raw_get(PDF_PAYLOAD_KEY)))
+                framed = read_framed(read_bytes)
+                extract.nbytes = framed and len(framed[1])
+            if framed is None:
+                raise ValueError("PDF payload stream has no payload header")
+            header, payload = framed
+            return finish_payload(payload, decrypt, key, header.codec)
+        return metadata.get(PDF_MESSAGE_KEY, 'No hidden message found')
+
+def capacity(path):
+    """PDF payloads are not limited by the cover; returns None"""
+    validate_pdf(path).close()
+    return None
+
+def detect(path):
+    """Return the payload header if the PDF carries a message, else None
+
+    Only the trailer, the Info dictionary and the first chunk of a payload
+    stream are read. Metadata-mode messages get a header built from their
+    length.
+    """
+    with validate_pdf(path) as reader:
+        metadata = reader.metadata or {}
+        if PDF_PAYLOAD_KEY in metadata:
+            return read_header(ChunkReader(reader.iter_stream(metadata.raw_get(PDF_PAYLOAD_KEY))))
+        if PDF_MESSAGE_KEY in metadata:
+            return PayloadHeader(len(to_bytes(metadata[PDF_MESSAGE_KEY])))
+    return None
+
+embed = encode_pdf
+extract = decode_pdf
+
+def cli_options(args, encode):
+    """Carrier-specific keyword arguments for embed/extract from parsed CLI arguments"""
+    return {'mode': args.pdf_mode} if encode else {}
@@ -0,0 +1,402 @@
+"""
+Lazy PDF access and incremental updates
+LazyPdfReader parses only the newest trailer up front and resolves objects
+through the xref on demand, so reading the Info dictionary touches a few
+small regions of the file whatever its size. For writing, the original
+file is copied byte for byte and a new Info dictionary, xref section and
+trailer are appended after it.
+"""
+
+import io
+import os
+import re
+import shutil
+import zlib
+from PyPDF2 import PdfReader
+from PyPDF2.errors import PdfReadError
+from PyPDF2.generic import (DictionaryObject, IndirectObject, NameObject, NullObject,
+                            NumberObject, TextStringObject, read_object)
+
+TAIL_SIZE = 1024  # startxref and %%EOF must sit in the last 1024 bytes
+XREF_ENTRY_SIZE = 20
+STREAM_CHUNK = 1 << 16   # Bytes read or compressed at a time for stream objects
+STREAM_HEAD_SIZE = 1024  # Enough to hold an object header and a small stream dictionary
+WHITESPACE = b' \t\r\n\x00\x0c'
+OBJECT_HEADER = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+
+def _startxref(f):
+    """Return the offset of the newest xref section from the file tail"""
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(max(size - TAIL_SIZE, 0))
+    match = None
+    for match in re.finditer(rb'startxref\s+(\d+)', f.read()):
+        pass
+    if match is None:
+        raise ValueError("No startxref found (truncated or damaged PDF)")
+    return int(match.group(1))
+
+def _skip_whitespace(stream):
+    while True:
+        tok = stream.read(1)
+        if not tok or tok not in WHITESPACE:
+            break
+    if tok:
+        stream.seek(-1, 1)
+
+class LazyPdfReader:
+    """Read-only PDF access that parses the trailer and resolves objects on demand
+
+    Xref sections are loaded one at a time along the /Prev chain, newest
+    first, and only until the requested object is found. If the xref cannot
+    be used (damaged file, unusual layout), the reader falls back to a
+    PyPDF2 PdfReader, which rebuilds it.
+    """
+
+    strict = True  # Read by PyPDF2's object parser
+
+    def __init__(self, path):
+        self.stream = open(path, 'rb')
+        self.startxref = None
+        self._full = None
+        self._objects = {}
+        self._object_streams = {}
+        self._sections = []
+        try:
+            self.startxref = _startxref(self.stream)
+            self._pending = [self.startxref]
+            self._seen = set()
+            self.trailer = self._load_section()[1]
+        except Exception:
+            self._fallback()
+
+    def close(self):
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def is_encrypted(self):
+        return '/Encrypt' in self.trailer
+
+    @property
+    def metadata(self):
+        """The document Info dictionary, or None"""
+        info = self.trailer.get('/Info')
+        info = info.get_object() if info is not None else None
+        return info if isinstance(info, DictionaryObject) else None
+
+    @property
+    def page_count(self):
+        """Page count from the page tree root, without walking the tree"""
+        return int(self.trailer['/Root']['/Pages']['/Count'])
+
+    def get_object(self, ref):
+        """Resolve an IndirectObject (or object number)"""
+        number = getattr(ref, 'idnum', ref)
+        if self._full is not None:
+            return self._full.get_object(IndirectObject(number, getattr(ref, 'generation', 0), self._full))
+        if number not in self._objects:
+            try:
+                self._objects[number] = self._resolve(number)
+            except Exception:
+                self._fallback()
+                return self.get_object(ref)
+        return self._objects[number]
+
+    def _fallback(self):
+        self.stream.seek(0)
+        self._full = PdfReader(self.stream, strict=False)
+        self.trailer = self._full.trailer
+
+    def _load_section(self):
+        """Parse the next xref section in the chain; returns (section, trailer)"""
+        offset = self._pending.pop()
+        self._seen.add(offset)
+        self.stream.seek(offset)
+        if self.stream.read(4) == b'xref':
+            section, trailer = self._read_table()
+        else:
+            trailer = self._read_at(offset)
+            if trailer.get('/Type') != '/XRef':
+                raise PdfReadError(f"No xref section at offset {offset}")
+            section = ('stream', self._xref_stream_entries(trailer))
+
+        # Hybrid files: the table comes first, then /XRefStm, then /Prev
+        for key in ('/Prev', '/XRefStm'):
+            if key in trailer and trailer[key] not in self._seen:
+                self._pending.append(int(trailer[key]))
+        self._sections.append(section)
+        return section, trailer
+
+    def _read_table(self):
+        subsections = []
+        while True:
+            pos = self.stream.tell()
+            line = self.stream.readline()
+            if not line:
+                raise PdfReadError("Unterminated xref table")
+            if b'trailer' in line:
+                self.stream.seek(pos + line.index(b'trailer') + 7)
+                break
+            if line.strip():
+                start, count = map(int, line.split())
+                subsections.append((start, count, self.stream.tell()))
+                self.stream.seek(count * XREF_ENTRY_SIZE, 1)
+        _skip_whitespace(self.stream)
+        return ('table', subsections), read_object(self.stream, self)
+
+    def _xref_stream_entries(self, xref):
+        """Decode a cross-reference stream into {number: (type, field2, field3)}"""
+        widths = [int(w) for w in xref['/W']]
+        index = [int(i) for i in xref.get('/Index', [0, xref['/Size']])]
+        data = xref.get_data()
+        entries = {}
+        pos = 0
+        for start, count in zip(index[::2], index[1::2]):
+            for number in range(start, start + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(data[pos:pos + width], 'big'))
+                    pos += width
+                if widths[0] == 0:
+                    fields[0] = 1  # Type defaults to an uncompressed object
+                entries.setdefault(number, tuple(fields))
+        return entries
+
+    def _sections_iter(self):
+        yield from self._sections
+        while self._pending:
+            yield self._load_section()[0]
+
+    def _locate(self, number):
+        """Return ('offset', file offset), ('compressed', stream, index) or None if free"""
+        for kind, data in self._sections_iter():
+            if kind == 'table':
+                for start, count, pos in data:
+                    if start <= number < start + count:
+                        self.stream.seek(pos + (number - start) * XREF_ENTRY_SIZE)
+                        entry = self.stream.read(XREF_ENTRY_SIZE)
+                        if entry[17:18] != b'n':
+                            return None
+                        return ('offset', int(entry[:10]))
+            elif number in data:
+                kind, field2, field3 = data[number]
+                if kind == 1:
+                    return ('offset', field2)
+                if kind == 2:
+                    return ('compressed', field2, field3)
+                return None
+        return None
+
+    def _resolve(self, number):
+        location = self._locate(number)
+        if location is None:
+            return NullObject()
+        if location[0] == 'offset':
+            return self._read_at(location[1])
+        return self._read_compressed(*location[1:])
+
+    def iter_stream(self, ref, chunk_size=STREAM_CHUNK):
+        """Yield the decoded data of a stream object in chunks
+
+        Only the stream dictionary is parsed; unfiltered and FlateDecode
+        data is read and inflated chunk by chunk. Other filters go through
+        PyPDF2 in one piece.
+        """
+        location = None if self._full is not None else self._locate(ref.idnum)
+        if location is None or location[0] != 'offset':
+            yield ref.get_object().get_data()
+            return
+
+        self.stream.seek(location[1])
+        head = self.stream.read(STREAM_HEAD_SIZE)
+        match = OBJECT_HEADER.match(head)
+        keyword = head.find(b'stream', match.end() if match else 0)
+        if match is None or keyword == -1:
+            raise PdfReadError(f"Object {ref.idnum} is not a stream")
+        info = read_object(io.BytesIO(head[match.end():keyword].strip()), self)
+        data_start = location[1] + keyword + 6
+        data_start += 2 if head[keyword + 6:keyword + 8] == b'\r\n' else 1
+        length = int(info['/Length'])
+        filters = info.get('/Filter')
+        filters = [] if filters is None else filters if isinstance(filters, list) else [filters]
+        if filters not in ([], ['/FlateDecode']) or '/DecodeParms' in info:
+            yield ref.get_object().get_data()
+            return
+
+        decompressor = zlib.decompressobj() if filters else None
+        position = data_start
+        while length > 0:
+            self.stream.seek(position)
+            chunk = self.stream.read(min(chunk_size, length))
+            if not chunk:
+                raise PdfReadError("Stream data truncated")
+            position += len(chunk)
+            length -= len(chunk)
+            yield decompressor.decompress(chunk) if decompressor else chunk
+        if decompressor:
+            yield decompressor.flush()
+
+    def _read_at(self, offset):
+        self.stream.seek(offset)
+        match = OBJECT_HEADER.match(self.stream.read(64))
+        if match is None:
+            raise PdfReadError(f"No object at offset {offset}")
+        self.stream.seek(offset + match.end())
+        _skip_whitespace(self.stream)
+        return read_object(self.stream, self)
+
+    def _read_compressed(self, stream_number, index):
+        if stream_number not in self._object_streams:
+            objstm = self.get_object(stream_number)
+            data = objstm.get_data()
+            first = int(objstm['/First'])
+            numbers = [int(n) for n in data[:first].split()]
+            self._object_streams[stream_number] = (data, first, numbers[1::2])
+        data, first, offsets = self._object_streams[stream_number]
+        buffer = io.BytesIO(data)
+        buffer.seek(first + offsets[index])
+        _skip_whitespace(buffer)
+        return read_object(buffer, self)
+
+def copy_file(src, dst):
+    """Copy src to dst, in kernel space where copy_file_range is available"""
+    with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+        size = os.fstat(fin.fileno()).st_size
+        if hasattr(os, 'copy_file_range'):
+            try:
+                copied = 0
+                while copied < size:
+                    count = os.copy_file_range(fin.fileno(), fout.fileno(), size - copied)
+                    if count == 0:
+                        break
+                    copied += count
+                if copied == size:
+                    return
+            except OSError:
+                pass  # Unsupported filesystem: fall back to a userspace copy
+            fin.seek(0)
+            fout.seek(0)
+            fout.truncate()
+        shutil.copyfileobj(fin, fout, 1 << 20)
+
+def _xref_section(entries):
+    """Classic xref section for (number, generation, offset) entries
+
+    Entry 0 is always included so the section is zero-indexed, which some
+    readers expect.
+    """
+    rows = [(0, 65535, 0, 'f')] + [(number, generation, offset, 'n')
+                                   for number, generation, offset in sorted(entries)]
+    out = [b"xref\n"]
+    i = 0
+    while i < len(rows):
+        j = i + 1
+        while j < len(rows) and rows[j][0] == rows[j - 1][0] + 1:
+            j += 1
+        out.append(f"{rows[i][0]} {j - i}\n".encode())
+        out.extend(f"{offset:010d} {generation:05d} {kind} \n".encode()
+                   for _, generation, offset, kind in rows[i:j])
+        i = j
+    return b"".join(out)
+
+def _write_stream(f, number, chunks):
+    """Write a FlateDecode stream object with an indirect /Length, compressing chunk by chunk
+
+    Returns the (number, generation, offset) entries of the stream and its
+    length object (number + 1).
+    """
+    offset = f.tell()
+    f.write(f"{number} 0 obj\n<< /Filter /FlateDecode /Length {number + 1} 0 R >>\nstream\n".encode())
+    start = f.tell()
+    compressor = zlib.compressobj(9)
+    for chunk in chunks:
+        for pos in range(0, len(chunk), STREAM_CHUNK):
+            f.write(compressor.compress(chunk[pos:pos + STREAM_CHUNK]))
+    f.write(compressor.flush())
+    length = f.tell() - start
+    f.write(b"\nendstream\nendobj\n")
+    length_offset = f.tell()
+    f.write(f"{number + 1} 0 obj\n{length}\nendobj\n".encode())
+    return [(number, 0, offset), (number + 1, 0, length_offset)]
+
+def append_info(pdf_path, updates, output_path=None, reader=None, streams=None):
+    """Write pdf_path to output_path with updates merged into its Info dictionary
+
+    The original bytes are kept unchanged; a replacement Info object, an
+    xref section for it and a trailer chained to the previous one via
+    /Prev are appended. With output_path None the file is updated in place.
+    reader is an already open LazyPdfReader for pdf_path.
+
+    updates maps Info keys to text, or to None to remove the key. streams
+    maps Info keys to iterables of byte chunks; each is written as a new
+    FlateDecode stream object and the key is set to a reference to it.
+    """
+    streams = streams or {}
+    own_reader = reader is None
+    reader = reader or LazyPdfReader(pdf_path)
+    try:
+        if reader.startxref is None:
+            raise ValueError("PDF has no usable startxref; use a full rewrite instead")
+        trailer = reader.trailer
+        info = DictionaryObject()
+        info_ref = trailer.raw_get('/Info') if '/Info' in trailer else None
+        if info_ref is not None:
+            info.update(info_ref.get_object())
+        size = int(trailer['/Size'])
+        if isinstance(info_ref, IndirectObject):
+            number, generation = info_ref.idnum, info_ref.generation
+        else:
+            number, generation = size, 0
+            size += 1
+        for key, value in updates.items():
+            if value is None:
+                info.pop(NameObject(key), None)
+            else:
+                info[NameObject(key)] = TextStringObject(value)
+
+        new_trailer = DictionaryObject({
+            NameObject('/Root'): trailer.raw_get('/Root'),
+            NameObject('/Info'): IndirectObject(number, generation, reader),
+            NameObject('/Prev'): NumberObject(reader.startxref),
+        })
+        if '/ID' in trailer:
+            new_trailer[NameObject('/ID')] = trailer.raw_get('/ID')
+    finally:
+        if own_reader:
+            reader.close()
+
+    if output_path is None or os.path.abspath(output_path) == os.path.abspath(pdf_path):
+        output_path = pdf_path
+    else:
+        copy_file(pdf_path, output_path)
+
+    with open(output_path, 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) not in b'\r\n':
+            f.write(b'\n')
+
+        entries = []
+        for key, chunks in streams.items():
+            entries += _write_stream(f, size, chunks)
+            info[NameObject(key)] = IndirectObject(size, 0, reader)
+            size += 2
+
+        out = io.BytesIO()
+        entries.append((number, generation, f.tell()))
+        out.write(f"{number} {generation} obj\n".encode())
+        info.write_to_stream(out, None)
+        out.write(b"\nendobj\n")
+
+        xref_offset = f.tell() + out.tell()
+        out.write(_xref_section(entries))
+        out.write(b"trailer\n")
+        new_trailer[NameObject('/Size')] = NumberObject(size)
+        new_trailer.write_to_stream(out, None)
+        f.write(out.getvalue())
+        f.write(f"\nstartxref\n{xref_offset}\n%%EOF\n".encode())
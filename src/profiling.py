@@ -0,0 +1,151 @@
+"""
+Per-stage timing hooks
+Carriers wrap their steps (validate, read, compress, encrypt, serialize,
+embed, extract, decrypt, write...) in `with stage(name, nbytes):` blocks
+and call progress(done, total) from their long loops. Observers attached
+with add_observer() are told when each stage starts and finishes and how
+far loops have got; with none attached stage() returns a shared no-op, so
+the instrumentation costs next to nothing. Profile is the built-in
+observer behind the CLI's --profile flag.
+"""
+
+import time
+
+_observers = []
+
+class Observer:
+    """Base class for stage observers; override either method"""
+
+    def start(self, name):
+        """Called when a stage is entered"""
+
+    def finish(self, name, seconds, nbytes):
+        """Called when a stage exits with its wall time and bytes processed (or None)"""
+
+    def progress(self, done, total):
+        """Called periodically from long loops; raising here aborts the operation"""
+
+def add_observer(observer):
+    _observers.append(observer)
+
+def remove_observer(observer):
+    _observers.remove(observer)
+
+class _Stage:
+    __slots__ = ('name', 'nbytes', 'started')
+
+    def __init__(self, name, nbytes):
+        self.name = name
+        self.nbytes = nbytes  # May be set inside the block once known
+
+    def __enter__(self):
+        for observer in _observers:
+            observer.start(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.started
+        for observer in reversed(_observers):
+            observer.finish(self.name, seconds, self.nbytes)
+        return False
+
+class _NullStage:
+    __slots__ = ()
+
+    @property
+    def nbytes(self):
+        return None
+
+    @nbytes.setter
+    def nbytes(self, value):
+        pass  # Shared instance: byte counts are discarded
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+def stage(name, nbytes=None):
+    """Context manager marking a named stage of work over nbytes bytes"""
+    if not _observers:
+        return _NULL_STAGE
+    return _Stage(name, nbytes)
+
+def progress(done, total):
+    """Report that done of total units of the current loop are finished"""
+    for observer in _observers:
+        observer.progress(done, total)
+
+class Profile(Observer):
+    """Collects wall time, bytes and tracemalloc peak per stage
+
+    Stages nest: an inner stage is reported as 'outer/inner' and its time
+    and memory are included in the outer one. Peaks are measured above the
+    memory already allocated when the stage started. Use as a context
+    manager to attach it (and trace memory) for the duration of a block.
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.stages = {}
+        self._stack = []  # [path, traced at start, peak seen in finished children]
+        self._started_tracing = False
+        self._started = self._seconds = None
+
+    def __enter__(self):
+        if self.memory:
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+        add_observer(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._seconds = time.perf_counter() - self._started
+        remove_observer(self)
+        if self._started_tracing:
+            self._tracemalloc.stop()
+        return False
+
+    def start(self, name):
+        path = f"{self._stack[-1][0]}/{name}" if self._stack else name
+        current = 0
+        if self.memory:
+            current, peak = self._tracemalloc.get_traced_memory()
+            if self._stack:  # Keep the parent's peak before resetting it
+                self._stack[-1][2] = max(self._stack[-1][2], peak)
+            self._tracemalloc.reset_peak()
+        self.stages.setdefault(path, {'stage': path, 'calls': 0, 'seconds': 0.0, 'bytes': None,
+                                      'peak_bytes': 0 if self.memory else None})
+        self._stack.append([path, current, 0])
+
+    def finish(self, name, seconds, nbytes):
+        path, base, child_peak = self._stack.pop()
+        entry = self.stages[path]
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        if nbytes is not None:
+            entry['bytes'] = (entry['bytes'] or 0) + nbytes
+        if self.memory:
+            peak = max(self._tracemalloc.get_traced_memory()[1], child_peak)
+            entry['peak_bytes'] = max(entry['peak_bytes'], peak - base)
+            if self._stack:
+                self._stack[-1][2] = max(self._stack[-1][2], peak)
+
+    def report(self):
+        """Return the breakdown as a JSON-serializable dict, stages in first-seen order"""
+        stages = []
+        for entry in self.stages.values():
+            entry = dict(entry, seconds=round(entry['seconds'], 6))
+            if entry['bytes'] and entry['seconds']:
+                entry['mb_per_s'] = round(entry['bytes'] / entry['seconds'] / 1e6, 3)
+            stages.append(entry)
+        return {'seconds': None if self._seconds is None else round(self._seconds, 6),
+                'stages': stages}
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Corpus scanner: find the files that carry payloads
+Walks directory trees, sniffs each file's type from its leading bytes and
+checks it in a process pool with the carrier's detect(), which reads only
+the payload header (or the PDF trailer and Info dictionary). Only hits are
+extracted. Results stream out as JSON lines; with a checkpoint file an
+interrupted sweep picks up where it stopped.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import struct
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+SNIFF_SIZE = 1024  # A PDF header may follow up to 1 KiB of junk
+IN_FLIGHT = 8      # Files queued per worker, so huge trees are not walked up front
+STATUSES = ('hit', 'miss', 'skipped', 'error')
+BMP_INFO_SIZES = (12, 40, 56, 108, 124)  # Every BITMAPINFOHEADER revision
+PDF_HEADER = re.compile(rb'(?:^|[\r\n])%PDF-\d\.\d')
+
+def _is_bmp(head, size):
+    """Whether head starts a BMP: a known DIB header and a plausible file size"""
+    if len(head) < 18 or not head.startswith(b'BM'):
+        return False
+    declared, offset, info_size = struct.unpack('<I4xII', head[2:18])
+    if info_size not in BMP_INFO_SIZES or offset < 14 + info_size:
+        return False
+    # Some writers leave the size field zero; otherwise it cannot exceed the file
+    return declared == 0 or offset <= declared <= (size if size is not None else declared)
+
+def sniff(head, size=None):
+    """Carrier type of a file from its first SNIFF_SIZE bytes (and its size), or None"""
+    if head.startswith(b'\x89PNG\r\n\x1a\n') or _is_bmp(head, size):
+        return 'image'
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'audio'
+    if PDF_HEADER.search(head):  # At the start of the file or of a line
+        return 'pdf'
+    return None
+
+def walk(paths):
+    """Yield every file under the given files and directories, in sorted order"""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                yield os.path.join(dirpath, name)
+
+def scan_file(path, extract=True, key=None):
+    """Check one file for a payload; returns a result dict
+
+    status is 'hit', 'miss', 'skipped' (not an image, WAV or PDF, or
+    rejected by its carrier, with the reason) or 'error'. Hits carry the
+    payload size and, with extract=True, the message (decrypted when a
+    key is given) or the extraction error.
+    """
+    import carriers
+
+    start = time.perf_counter()
+    result = {'path': path}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            with open(path, 'rb') as f:
+                result['type'] = sniff(f.read(SNIFF_SIZE), os.fstat(f.fileno()).st_size)
+            if result['type'] is None:
+                result['status'] = 'skipped'
+            else:
+                carrier = carriers.get(result['type'])
+                try:
+                    header = carrier.detect(path)
+                except ValueError as e:  # Looked like a carrier but is not a valid one
+                    result.update(status='skipped', reason=str(e))
+                else:
+                    if header is None:
+                        result['status'] = 'miss'
+                    else:
+                        result.update(status='hit', bytes=header.length, codec=header.codec)
+                        if extract:
+                            try:
+                                result['message'] = carrier.extract(path, bool(key), key)
+                            except Exception as e:
+                                result['error'] = str(e)
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    result['seconds'] = round(time.perf_counter() - start, 6)
+    return result
+
+class Checkpoint:
+    """Append-only JSONL record of finished files, keyed by path, size and mtime
+
+    Modified files no longer match their entry and are scanned again. A
+    line torn by an interrupted run is ignored.
+    """
+
+    def __init__(self, path):
+        self.done = set()
+        torn = False
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    torn = not line.endswith('\n')
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.done.add((entry['path'], entry['size'], entry['mtime_ns']))
+        self.file = open(path, 'a', encoding='utf-8')
+        if torn:
+            self.file.write('\n')
+
+    @staticmethod
+    def entry(path):
+        st = os.stat(path)
+        return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+    def add(self, entry):
+        path, size, mtime_ns = entry
+        self.file.write(json.dumps({'path': path, 'size': size, 'mtime_ns': mtime_ns}) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def run_scan(paths, workers=None, report=None, checkpoint=None, extract=True, key=None,
+             include_all=False):
+    """Scan every file under paths across a process pool
+
+    Hits and errors (every file with include_all=True) are written to
+    report as JSON lines as they finish; each finished file is then added
+    to the checkpoint, and files already in it are not scanned again.
+    Returns counts per status, plus 'resumed' for the files skipped that way.
+    """
+    report = report or sys.stdout
+    workers = workers or os.cpu_count()
+    counts = dict.fromkeys(STATUSES + ('resumed',), 0)
+    pending = {}
+
+    def finish(futures):
+        for future in futures:
+            entry = pending.pop(future)
+            result = future.result()
+            counts[result['status']] += 1
+            if include_all or result['status'] in ('hit', 'error'):
+                report.write(json.dumps(result) + '\n')
+                report.flush()
+            if entry is not None:
+                checkpoint.add(entry)
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for path in walk(paths):
+            entry = None
+            if checkpoint is not None:
+                with contextlib.suppress(OSError):  # Unreadable files are reported by the worker
+                    entry = checkpoint.entry(path)
+                if entry in checkpoint.done:
+                    counts['resumed'] += 1
+                    continue
+            pending[pool.submit(scan_file, path, extract, key)] = entry
+            if len(pending) >= workers * IN_FLIGHT:
+                finish(wait(pending, return_when=FIRST_COMPLETED).done)
+        finish(list(pending))
+    finally:
+        pool.shutdown(cancel_futures=True)  # Interrupted: drop the queued files
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="stego.py scan",
+        description="Find (and extract) payloads in directory trees of PNG/BMP/WAV/PDF files"
+    )
+    parser.add_argument("paths", nargs="+", help="Files and directories to scan")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                      help="Worker processes (default: CPU count)")
+    parser.add_argument("-o", "--output", help="Write JSONL results here instead of stdout")
+    parser.add_argument("--checkpoint", metavar="FILE",
+                      help="Record finished files here and skip them when rerun")
+    parser.add_argument("--all", action="store_true", help="Also report misses and skipped files")
+    parser.add_argument("--no-extract", action="store_true", help="Only detect payloads")
+    parser.add_argument("-k", "--key", help="Decrypt hits with this key")
+    args = parser.parse_args(argv)
+
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    key = args.key.encode() if args.key else None
+    start = time.perf_counter()
+    try:
+        with contextlib.ExitStack() as stack:
+            report = None
+            if args.output:  # Append to the results of the run being resumed
+                mode = 'a' if checkpoint and checkpoint.done else 'w'
+                report = stack.enter_context(open(args.output, mode, encoding='utf-8'))
+            counts = run_scan(args.paths, args.workers, report, checkpoint,
+                              not args.no_extract, key, args.all)
+    except KeyboardInterrupt:
+        print("Interrupted" + (f"; rerun with --checkpoint {args.checkpoint} to resume"
+                               if checkpoint else ""), file=sys.stderr)
+        return 130
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    scanned = sum(counts[status] for status in STATUSES)
+    print(f"{counts['hit']} hits in {scanned} files ({counts['skipped']} skipped, "
+          f"{counts['error']} errors, {counts['resumed']} already scanned) in "
+          f"{time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 1 if counts['error'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Keyed scatter order for the image and audio carriers
+Instead of filling pixels/frames from the start, entry i of the embedded
+stream goes to position order(i), where order is a permutation of the
+carrier's entries derived from a passphrase (or the encryption key). The
+permutation is a small Feistel network over the next power of two above
+the entry count, cycle-walked back into range, so positions are computed
+on demand with vectorized NumPy for just the entries in use: nothing the
+size of the carrier is ever materialized.
+
+Scattering hides where the bits are, not what they say; use encryption
+for confidentiality.
+"""
+
+import hashlib
+import numpy as np
+from bitcodec import bits_to_bytes, extract_lsb
+from payload import to_bytes
+
+ROUNDS = 8
+GATHER_GAP = 4096  # Entries this close together are read in one run
+
+def _mix(values, key):
+    """SplitMix64 finalizer of values + key (uint64 arrays wrap on overflow)"""
+    z = (values + key) * np.uint64(0x9E3779B97F4A7C15)
+    z ^= z >> np.uint64(30)
+    z *= np.uint64(0xBF58476D1CE4E5B9)
+    z ^= z >> np.uint64(27)
+    z *= np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+class ScatterOrder:
+    """Keyed permutation of range(count), evaluated on arrays of indices"""
+
+    def __init__(self, key, count):
+        self.count = count
+        self.bits = max(int(count - 1).bit_length(), 2)
+        digest = hashlib.blake2b(to_bytes(key), digest_size=8 * ROUNDS, person=b'PhantomVaultScat')
+        digest.update(count.to_bytes(8, 'big'))  # Different covers get unrelated orders
+        self.keys = np.frombuffer(digest.digest(), dtype='<u8').astype(np.uint64)
+
+    def _permute(self, x):
+        """One pass of the unbalanced Feistel network over [0, 2**bits)"""
+        left_bits, right_bits = self.bits // 2, self.bits - self.bits // 2
+        for key in self.keys:
+            left, right = x >> np.uint64(right_bits), x & np.uint64((1 << right_bits) - 1)
+            left ^= _mix(right, key) & np.uint64((1 << left_bits) - 1)
+            x = (right << np.uint64(left_bits)) | left  # Halves swap, and so do their widths
+            left_bits, right_bits = right_bits, left_bits
+        return x
+
+    def __call__(self, indices):
+        """Positions of the given entry indices (an array of ints below count)"""
+        x = self._permute(np.asarray(indices, dtype=np.uint64))
+        outside = np.flatnonzero(x >= self.count)
+        while len(outside):  # Cycle-walk until every value is back in range
+            x[outside] = self._permute(x[outside])
+            outside = outside[x[outside] >= self.count]
+        return x.astype(np.int64)
+
+def resolve_key(scatter, key):
+    """The scatter passphrase as bytes; scatter=True means the encryption key"""
+    if scatter is True:
+        if not key:
+            raise ValueError("Scatter mode without a passphrase needs the encryption key")
+        return to_bytes(key)
+    return to_bytes(scatter)
+
+def scatter_spans(spans, order):
+    """Map (first entry, channels, depth, bits) spans to keyed positions
+
+    The returned spans hold a sorted array of positions instead of a first
+    entry, with the bits regrouped to match, so embed_span can patch any
+    block of the carrier with a binary search.
+    """
+    scattered = []
+    for first, channels, depth, bits in spans:
+        per_entry = channels * depth
+        entries = -(-len(bits) // per_entry)
+        rows = order(np.arange(first, first + entries))
+        ranks = np.argsort(rows)
+        if len(bits) < entries * per_entry:
+            bits = np.concatenate([bits, np.zeros(entries * per_entry - len(bits), dtype=np.uint8)])
+        scattered.append((rows[ranks], channels, depth, bits.reshape(entries, per_entry)[ranks].reshape(-1)))
+    return scattered
+
+def gather(rows, read_run, gap=GATHER_GAP):
+    """Return the carrier entries at rows, in the order given
+
+    read_run(start, count) returns entries [start, start + count) as a 2-D
+    array; nearby rows are fetched together so each read covers a run.
+    """
+    ranks = np.argsort(rows)
+    ordered = rows[ranks]
+    breaks = np.flatnonzero(np.diff(ordered) > gap) + 1
+    out = None
+    for lo, hi in zip(np.r_[0, breaks], np.r_[breaks, len(ordered)]):
+        start = int(ordered[lo])
+        values = read_run(start, int(ordered[hi - 1]) - start + 1)
+        if out is None:
+            out = np.empty((len(rows), values.shape[1]), dtype=values.dtype)
+        out[ranks[lo:hi]] = values[ordered[lo:hi] - start]
+    return out
+
+def scatter_reader(order, first, channels, depth, fetch, readahead=0):
+    """Return read_bytes(offset, count) over keyed entries first, first + 1, ...
+
+    fetch(rows) returns the carrier entries at the given positions. At
+    least readahead bytes are fetched per call and kept, so a header read
+    in several small pieces costs one fetch.
+    """
+    per_entry = channels * depth
+    cache = [0, b'']
+
+    def read(offset, count):
+        start, stop = offset * 8, (offset + count) * 8
+        lo = first + start // per_entry
+        hi = min(first + -(-stop // per_entry), order.count)
+        if lo >= hi:
+            return b''
+        values = fetch(order(np.arange(lo, hi)))[:, :channels]
+        base = (lo - first) * per_entry
+        return bits_to_bytes(extract_lsb(values, start - base, stop - base, depth))
+
+    def read_bytes(offset, count):
+        cached_offset, data = cache
+        if not cached_offset <= offset <= offset + count <= cached_offset + len(data):
+            cache[:] = offset, read(offset, max(count, readahead))
+            cached_offset, data = cache
+        return data[offset - cached_offset:offset - cached_offset + count]
+    return read_bytes
@@ -2,246 +2,226 @@
 """
 Advanced Steganography Tool with File Validation
 Supports: PNG, WAV, PDF with full error checking
+
+Each format is a carrier plugin (see carriers.py) imported only when it is
+selected, so e.g. decoding a WAV never loads PIL or PyPDF2.
 """
 
+import time
+_START = time.perf_counter()
+
 import argparse
-import os
-import struct
-import wave
-from PIL import Image
-from PyPDF2 import PdfReader, PdfWriter
-from utils import encrypt_message, decrypt_message, generate_key
+import contextlib
+import importlib
+import sys
+import carriers
 
-def validate_image(filepath):
-    """Validate image file is supported format"""
-    try:
-        with Image.open(filepath) as img:
-            if img.format not in ['PNG', 'BMP']:
-                raise ValueError(f"Unsupported image format: {img.format}. Use PNG or BMP")
-            return img
-    except Exception as e:
-        raise ValueError(f"Invalid image file: {str(e)}")
+_CORE_LOADED = time.perf_counter()
 
-def validate_wav(filepath):
-    """Validate WAV file meets requirements"""
-    try:
-        with wave.open(filepath, 'rb') as wav:
-            if wav.getnchannels() != 1:
-                raise ValueError("Only mono WAV files supported")
-            if wav.getsampwidth() != 2:
-                raise ValueError("Only 16-bit WAV files supported")
-            if wav.getframerate() not in [44100, 48000]:
-                print(f"Warning: Non-standard sample rate {wav.getframerate()}")
-            return wav.getparams()
-    except wave.Error as e:
-        raise ValueError(f"Invalid WAV file: {str(e)}")
+# Public names of the carrier plugins, still importable from this module
+_EXPORTS = {
+    'LAYOUT_ALPHA': 'image',
+    'validate_image': 'image',
+    'image_capacity': 'image',
+    'encode_image': 'image',
+    'decode_image': 'image',
+    'WAV_BLOCK_FRAMES': 'audio',
+    'validate_wav': 'audio',
+    'audio_capacity': 'audio',
+    'encode_audio': 'audio',
+    'decode_audio': 'audio',
+    'PDF_MESSAGE_KEY': 'pdf',
+    'PDF_PAYLOAD_KEY': 'pdf',
+    'validate_pdf': 'pdf',
+    'encode_pdf': 'pdf',
+    'decode_pdf': 'pdf',
+}
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(carriers.get(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def validate_pdf(filepath):
-    """Validate PDF is not password protected"""
+def _pick_cover(args):
+    """Choose the smallest catalogued cover that fits the CLI message"""
+    from catalog import Catalog
+    from payload import compress_payload, to_bytes
+    
+    data = to_bytes(args.message)
+    codec = None
+    if args.compress:
+        codec, data = compress_payload(data, args.compress)
+    size = len(data)
+    if args.recipients:
+        from utils import envelope_size
+        size = envelope_size(size, args.recipients)
+    elif args.encrypt:
+        from utils import encrypted_size
+        size = encrypted_size(size)
+    depth, alpha = (args.depth, args.alpha) if args.type == 'image' else (1, False)
+    catalog = Catalog(args.catalog)
     try:
-        with open(filepath, 'rb') as f:
-            reader = PdfReader(f)
-            if reader.is_encrypted:
-                raise ValueError("Encrypted PDFs are not supported")
-            return len(reader.pages)
-    except Exception as e:
-        raise ValueError(f"Invalid PDF file: {str(e)}")
+        path = catalog.pick(size, args.type, depth, alpha, codec=bool(codec))
+    finally:
+        catalog.close()
+    if path is None:
+        raise ValueError("No catalogued cover is large enough for this message")
+    print(f"Using cover: {path}")
+    return path
 
-def encode_image(image_path, secret_msg, output_path, encrypt=False):
-    """Hide message in image with validation"""
-    img = validate_image(image_path)
-    
-    if encrypt:
-        key = generate_key()
-        print(f"ENCRYPTION KEY (SAVE THIS): {key.decode()}")
-        secret_msg = encrypt_message(secret_msg, key)
+def _report_import_time(run_start):
+    """Print where the CLI's startup time went (--import-time)"""
+    now = time.perf_counter()
+    lines = [f"stego core: {(_CORE_LOADED - _START) * 1000:.1f} ms"]
+    for name, (seconds, modules) in carriers.import_times.items():
+        lines.append(f"{name} carrier: {seconds * 1000:.1f} ms ({', '.join(modules)})")
+    lines.append(f"run: {(now - run_start) * 1000:.1f} ms")
+    lines.append(f"total since start: {(now - _START) * 1000:.1f} ms")
+    print("Import time:\n  " + "\n  ".join(lines), file=sys.stderr)
 
-    binary_msg = ''.join(format(ord(c), '08b') for c in secret_msg)
-    binary_msg += '1111111111111110'  # Delimiter
-    
-    if len(binary_msg) > img.width * img.height * 3:
-        raise ValueError(f"Message too large for image (max: {img.width*img.height*3//8} chars)")
-    
-    pixels = list(img.getdata())
-    new_pixels = []
-    msg_index = 0
-    
-    for pixel in pixels:
-        if msg_index < len(binary_msg):
-            new_pixel = []
-            for color in pixel[:3]:  # Only modify RGB channels
-                if msg_index < len(binary_msg):
-                    new_color = (color & 0xFE) | int(binary_msg[msg_index])
-                    new_pixel.append(new_color)
-                    msg_index += 1
+@contextlib.contextmanager
+def _profiling(args):
+    """Collect the --profile stage breakdown and --cprofile stats around a run"""
+    with contextlib.ExitStack() as stack:
+        profile = None
+        if args.profile:
+            from profiling import Profile
+            profile = stack.enter_context(Profile())
+        if args.cprofile:
+            import cProfile
+            profiler = cProfile.Profile()
+            stack.callback(profiler.dump_stats, args.cprofile)
+            stack.callback(profiler.disable)
+            profiler.enable()
+        try:
+            yield
+        finally:
+            stack.close()
+            if profile is not None:
+                import json
+                report = {'type': args.type, 'mode': 'encode' if args.encode else 'decode',
+                          'input': args.input, **profile.report()}
+                text = json.dumps(report, indent=2)
+                if args.profile == '-':
+                    print(text, file=sys.stderr)
                 else:
-                    new_pixel.append(color)
-            
-            if len(pixel) == 4:  # Preserve alpha
-                new_pixel.append(pixel[3])
-                
-            new_pixels.append(tuple(new_pixel))
-        else:
-            new_pixels.append(pixel)
-    
-    new_img = Image.new(img.mode, img.size)
-    new_img.putdata(new_pixels)
-    new_img.save(output_path)
+                    with open(args.profile, 'w', encoding='utf-8') as f:
+                        f.write(text + '\n')
 
-def decode_image(image_path, decrypt=False, key=None):
-    """Extract message from image with validation"""
-    validate_image(image_path)
-    
-    img = Image.open(image_path)
-    pixels = list(img.getdata())
-    binary_msg = ""
-    
-    for pixel in pixels:
-        for color in pixel[:3]:  # Check RGB channels
-            binary_msg += str(color & 1)
-    
-    delimiter = '1111111111111110'
-    if delimiter in binary_msg:
-        binary_msg = binary_msg.split(delimiter)[0]
-    
-    secret_msg = ""
-    for i in range(0, len(binary_msg), 8):
-        byte = binary_msg[i:i+8]
-        secret_msg += chr(int(byte, 2))
-    
-    if decrypt:
-        if not key:
-            key = input("Enter encryption key: ").encode()
-        secret_msg = decrypt_message(secret_msg, key)
-    
-    return secret_msg
+# Subcommands implemented in their own modules, imported only when used
+COMMANDS = {
+    'batch': 'batch',
+    'catalog': 'catalog',
+    'serve': 'daemon',
+    'client': 'client',
+    'scan': 'scan',
+}
 
-def encode_audio(audio_path, secret_msg, output_path, encrypt=False):
-    """Hide message in WAV with validation"""
-    params = validate_wav(audio_path)
-    
-    if encrypt:
-        key = generate_key()
-        print(f"ENCRYPTION KEY (SAVE THIS): {key.decode()}")
-        secret_msg = encrypt_message(secret_msg, key)
-
-    with wave.open(audio_path, 'rb') as audio:
-        frames = audio.readframes(audio.getnframes())
-    
-    binary_msg = ''.join(format(ord(c), '08b') for c in secret_msg)
-    binary_msg += '1111111111111110'
-    
-    frame_list = list(struct.unpack(f'{len(frames)}B', frames))
-    
-    if len(binary_msg) > len(frame_list):
-        max_chars = len(frame_list) // 8
-        raise ValueError(f"Message too large for audio (max: {max_chars} chars)")
-    
-    for i in range(len(binary_msg)):
-        frame_list[i] = (frame_list[i] & 0xFE) | int(binary_msg[i])
-    
-    new_frames = struct.pack(f'{len(frame_list)}B', *frame_list)
-    with wave.open(output_path, 'wb') as output:
-        output.setparams(params)
-        output.writeframes(new_frames)
-
-def decode_audio(audio_path, decrypt=False, key=None):
-    """Extract message from WAV with validation"""
-    validate_wav(audio_path)
-    
-    with wave.open(audio_path, 'rb') as audio:
-        frames = audio.readframes(audio.getnframes())
-    
-    binary_msg = ''.join(str(byte & 1) for byte in struct.unpack(f'{len(frames)}B', frames))
-    
-    delimiter = '1111111111111110'
-    if delimiter in binary_msg:
-        binary_msg = binary_msg.split(delimiter)[0]
-    
-    secret_msg = ""
-    for i in range(0, len(binary_msg), 8):
-        byte = binary_msg[i:i+8]
-        secret_msg += chr(int(byte, 2))
-    
-    if decrypt:
-        if not key:
-            key = input("Enter encryption key: ").encode()
-        secret_msg = decrypt_message(secret_msg, key)
-    
-    return secret_msg
-
-def encode_pdf(pdf_path, secret_msg, output_path):
-    """Hide message in PDF metadata"""
-    validate_pdf(pdf_path)
-    
-    reader = PdfReader(pdf_path)
-    writer = PdfWriter()
-    
-    for page in reader.pages:
-        writer.add_page(page)
-    
-    writer.add_metadata({
-        '/HiddenMessage': secret_msg,
-        '/Creator': 'Steganography Tool'
-    })
-    
-    with open(output_path, 'wb') as f:
-        writer.write(f)
-
-def decode_pdf(pdf_path):
-    """Extract message from PDF metadata"""
-    validate_pdf(pdf_path)
-    
-    reader = PdfReader(pdf_path)
-    metadata = reader.metadata
-    return metadata.get('/HiddenMessage', 'No hidden message found')
-
-if __name__ == "__main__":
+def build_parser():
+    """Argument parser for the encode/decode CLI"""
     parser = argparse.ArgumentParser(
         description="Secure Steganography Tool with File Validation",
         formatter_class=argparse.RawTextHelpFormatter
     )
     parser.add_argument("-e", "--encode", action="store_true", help="Encode mode")
     parser.add_argument("-d", "--decode", action="store_true", help="Decode mode")
-    parser.add_argument("-t", "--type", choices=['image','audio','pdf'], 
+    parser.add_argument("-t", "--type", choices=carriers.names(), 
                       required=True, help="File type to process")
     parser.add_argument("-x", "--encrypt", action="store_true", help="Enable encryption")
-    parser.add_argument("-i", "--input", required=True, help="Input file path")
+    parser.add_argument("-i", "--input", help="Input file path")
     parser.add_argument("-o", "--output", help="Output file path (encode mode)")
     parser.add_argument("-m", "--message", help="Message to hide (encode mode)")
     parser.add_argument("-k", "--key", help="Encryption key (decode mode)")
+    parser.add_argument("--recipient", dest="recipients", action="append", metavar="PUBLIC_PEM",
+                      help="Encrypt for this RSA public key file (repeatable, encode mode)")
+    parser.add_argument("--private-key", metavar="PRIVATE_PEM",
+                      help="Decrypt a recipient envelope with this RSA key file (decode mode)")
+    parser.add_argument("--compress", choices=['zlib', 'lzma', 'auto'],
+                      help="Compress the message before embedding (auto keeps the smallest)")
+    parser.add_argument("--stream", action="store_true",
+                      help="Process images in row strips (bounded memory for huge covers)")
+    parser.add_argument("--depth", type=int, choices=[1, 2, 3, 4], default=1,
+                      help="Bits per image channel (encode mode)")
+    parser.add_argument("--alpha", action="store_true",
+                      help="Also embed in the alpha channel of RGBA images (encode mode)")
+    parser.add_argument("--scatter", nargs="?", const=True, metavar="PASSPHRASE",
+                      help="Spread image/audio bits in a keyed pseudo-random order; without\n"
+                           "a passphrase the encryption key (-x / -k) is used")
+    parser.add_argument("--pdf-mode", choices=['metadata', 'stream'], default='metadata',
+                      help="Store PDF messages as Info text or as a compressed stream\n"
+                           "(encryption always uses a stream)")
+    parser.add_argument("--catalog", metavar="DB",
+                      help="Pick the smallest fitting cover from a catalog when -i is omitted")
+    parser.add_argument("--import-time", action="store_true",
+                      help="Report startup and carrier import cost on stderr")
+    parser.add_argument("--profile", nargs="?", const="-", metavar="JSON",
+                      help="Write a per-stage breakdown (time, bytes, peak memory) as JSON\n"
+                           "to this file, or to stderr without one")
+    parser.add_argument("--cprofile", metavar="PSTATS",
+                      help="Dump cProfile statistics for the run to this file")
+    return parser
+
+def main(argv=None):
+    """Run the CLI (or a subcommand) on argv; returns the exit status"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        command = importlib.import_module(COMMANDS[argv[0]])
+        return command.main(argv[1:])
     
-    args = parser.parse_args()
+    parser = build_parser()
+    args = parser.parse_args(argv)
     
+    run_start = time.perf_counter()
     try:
-        if args.encode:
-            if not args.message or not args.output:
-                parser.error("Encode mode requires --message and --output")
-            
-            if args.type == 'image':
-                encode_image(args.input, args.message, args.output, args.encrypt)
-            elif args.type == 'audio':
-                encode_audio(args.input, args.message, args.output, args.encrypt)
-            elif args.type == 'pdf':
-                if args.encrypt:
-                    print("Warning: PDF encryption not supported, using metadata only")
-                encode_pdf(args.input, args.message, args.output)
-            
-            print(f"Message encoded successfully in {args.output}")
-            
-        elif args.decode:
-            if args.type == 'image':
-                result = decode_image(args.input, args.encrypt, args.key)
-            elif args.type == 'audio':
-                result = decode_audio(args.input, args.encrypt, args.key)
-            elif args.type == 'pdf':
-                result = decode_pdf(args.input)
-            
-            print("Decoded message:", result)
-            
-        else:
-            parser.print_help()
-            
+        with _profiling(args):
+            return _run(parser, args)
     except Exception as e:
         print(f"Error: {str(e)}")
-        exit(1)
+        return 1
+    finally:
+        if args.import_time:
+            _report_import_time(run_start)
+
+def _run(parser, args):
+    """Encode or decode as parsed from the command line"""
+    for option in ('recipients', 'private_key'):
+        paths = getattr(args, option)
+        if paths:  # Replace key file paths by the key data
+            keys = []
+            for path in (paths if isinstance(paths, list) else [paths]):
+                with open(path, 'rb') as f:
+                    keys.append(f.read())
+            setattr(args, option, keys if isinstance(paths, list) else keys[0])
+    if args.private_key:
+        args.encrypt, args.key = True, args.private_key
+    if args.encode:
+        if not args.message or not args.output:
+            parser.error("Encode mode requires --message and --output")
+        if not args.input:
+            if not args.catalog or args.type == 'pdf':
+                parser.error("Encode mode requires --input (or --catalog for images/audio)")
+            args.input = _pick_cover(args)
+    
+        carrier = carriers.get(args.type)
+        carrier.embed(args.input, args.message, args.output, args.encrypt,
+                      recipients=args.recipients, compress=args.compress,
+                      **carrier.cli_options(args, encode=True))
+    
+        print(f"Message encoded successfully in {args.output}")
+    
+    elif args.decode:
+        if not args.input:
+            parser.error("Decode mode requires --input")
+        carrier = carriers.get(args.type)
+        result = carrier.extract(args.input, args.encrypt, args.key,
+                                 **carrier.cli_options(args, encode=False))
+    
+        print("Decoded message:", result)
+    
+    else:
+        parser.print_help()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,43 @@
-from Crypto.Cipher import AES
+from Crypto.Cipher import AES, PKCS1_OAEP
+from Crypto.Hash import SHA256
 from Crypto.PublicKey import RSA
 from Crypto.Random import get_random_bytes
+from collections import OrderedDict
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import base64
+import hashlib
+import itertools
+import os
+import struct
+
+KEY_CACHE_SIZE = 256  # Parsed RSA keys kept by load_rsa_key
+_key_cache = OrderedDict()
+
+# Chunked AES-256-GCM payload format (binary, raw bytes):
+#   format  1 byte   AEAD_FORMAT
+#   shift   1 byte   plaintext chunk size is 1 << shift
+#   prefix  7 bytes  random nonce prefix
+#   chunks           AES-GCM ciphertext + 16-byte tag per plaintext chunk
+# Chunk nonces are prefix || 4-byte counter || final flag, so reordered,
+# dropped or truncated chunks fail authentication. Fernet tokens (base64
+# text starting with 'g') are still accepted when decrypting.
+AEAD_FORMAT = 0x01
+AEAD_CHUNK_SHIFT = 16
+AEAD_PREFIX_SIZE = 7
+AEAD_TAG_SIZE = 16
+_AEAD_HEAD = struct.Struct('>BB7s')
+
+# Multi-recipient envelope (binary):
+#   format      1 byte   ENVELOPE_FORMAT
+#   count       2 bytes  number of recipients
+#   per recipient: 8-byte key fingerprint, 2-byte length, RSA-OAEP(SHA-256)
+#               wrapped 256-bit content key
+#   body        chunked AES-GCM payload (encrypt_stream) under the content key
+ENVELOPE_FORMAT = 0x02
+_ENVELOPE_HEAD = struct.Struct('>BH')
+_RECIPIENT = struct.Struct('>8sH')
 
 def generate_rsa_keys():
     """Generate RSA key pair"""
@@ -10,6 +46,30 @@ def generate_rsa_keys():
     public_key = key.publickey().export_key()
     return private_key, public_key
 
+def load_rsa_key(pem):
+    """Return (RsaKey, fingerprint) for a PEM/DER key, parsing each key once
+
+    Parsed keys live in a bounded LRU cache keyed by the SHA-256 of the key
+    data, so batch runs that reuse the same keys skip the PEM parsing. The
+    fingerprint (first 8 bytes of the SHA-256 of the public key DER) is the
+    same for both halves of a key pair. RsaKey objects are passed through.
+    """
+    if isinstance(pem, RSA.RsaKey):
+        return pem, _fingerprint(pem)
+    data = pem.encode() if isinstance(pem, str) else bytes(pem)
+    digest = hashlib.sha256(data).digest()
+    if digest in _key_cache:
+        _key_cache.move_to_end(digest)
+        return _key_cache[digest]
+    key = RSA.import_key(data)
+    entry = _key_cache[digest] = (key, _fingerprint(key))
+    if len(_key_cache) > KEY_CACHE_SIZE:
+        _key_cache.popitem(last=False)
+    return entry
+
+def _fingerprint(key):
+    return hashlib.sha256(key.publickey().export_key('DER')).digest()[:8]
+
 def encrypt_hybrid(public_key, message):
     """Encrypt with RSA+AES hybrid approach"""
     # Generate random AES key
@@ -20,8 +80,8 @@ def encrypt_hybrid(public_key, message):
     ciphertext, tag = cipher_aes.encrypt_and_digest(message.encode())
     
     # Encrypt AES key with RSA
-    recipient_key = RSA.import_key(public_key)
-    encrypted_aes_key = recipient_key.encrypt(aes_key, None)[0]
+    recipient_key, _ = load_rsa_key(public_key)
+    encrypted_aes_key = PKCS1_OAEP.new(recipient_key, SHA256).encrypt(aes_key)
     
     # Return all components
     return base64.b64encode(encrypted_aes_key).decode(), \
@@ -32,8 +92,8 @@ def encrypt_hybrid(public_key, message):
 def decrypt_hybrid(private_key, encrypted_aes_key, nonce, ciphertext, tag):
     """Decrypt RSA+AES hybrid message"""
     # Decrypt AES key with RSA
-    key = RSA.import_key(private_key)
-    aes_key = key.decrypt(base64.b64decode(encrypted_aes_key))
+    key, _ = load_rsa_key(private_key)
+    aes_key = PKCS1_OAEP.new(key, SHA256).decrypt(base64.b64decode(encrypted_aes_key))
     
     # Decrypt message with AES
     cipher_aes = AES.new(aes_key, AES.MODE_EAX, nonce=base64.b64decode(nonce))
@@ -43,15 +103,142 @@ def decrypt_hybrid(private_key, encrypted_aes_key, nonce, ciphertext, tag):
     )
     
     return message.decode()
-from cryptography.fernet import Fernet
 
 def generate_key():
-    return Fernet.generate_key()
+    """Return a new random 256-bit key, URL-safe base64 encoded"""
+    return base64.urlsafe_b64encode(os.urandom(32))
+
+def _aead(key):
+    try:
+        raw = base64.urlsafe_b64decode(key)
+    except ValueError:
+        raw = b''
+    if len(raw) != 32:
+        raise ValueError("Invalid key: expected 32 URL-safe base64-encoded bytes")
+    return AESGCM(raw)
+
+def _nonce(prefix, counter, final):
+    return prefix + struct.pack('>IB', counter, final)
+
+def _rechunk(chunks, size):
+    """Yield (block, is_last) pairs of exactly size bytes (the last may be shorter)"""
+    buffer = bytearray()
+    pending = None
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) > size:
+            if pending is not None:
+                yield pending, False
+            pending = bytes(buffer[:size])
+            del buffer[:size]
+    if buffer or pending is None:
+        if pending is not None:
+            yield pending, False
+        yield bytes(buffer), True
+    else:
+        yield pending, True
+
+def encrypt_stream(chunks, key, chunk_shift=AEAD_CHUNK_SHIFT):
+    """Encrypt an iterable of byte chunks, yielding the binary payload piece by piece"""
+    aead = _aead(key)
+    prefix = os.urandom(AEAD_PREFIX_SIZE)
+    yield _AEAD_HEAD.pack(AEAD_FORMAT, chunk_shift, prefix)
+    for counter, (block, final) in enumerate(_rechunk(chunks, 1 << chunk_shift)):
+        yield aead.encrypt(_nonce(prefix, counter, final), block, None)
+
+def decrypt_stream(chunks, key):
+    """Decrypt an iterable of payload chunks from encrypt_stream, yielding plaintext
+
+    Raises ValueError on a wrong key, tampering or truncation.
+    """
+    aead = _aead(key)
+    chunks = iter(chunks)
+    head = bytearray()
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= _AEAD_HEAD.size:
+            break
+    if len(head) < _AEAD_HEAD.size:
+        raise ValueError("Encrypted payload truncated")
+    fmt, shift, prefix = _AEAD_HEAD.unpack_from(head)
+    if fmt != AEAD_FORMAT or not 10 <= shift <= 24:
+        raise ValueError("Unsupported encrypted payload format")
+
+    rest = [bytes(head[_AEAD_HEAD.size:])]
+    blocks = _rechunk(itertools.chain(rest, chunks), (1 << shift) + AEAD_TAG_SIZE)
+    for counter, (block, final) in enumerate(blocks):
+        try:
+            yield aead.decrypt(_nonce(prefix, counter, final), block, None)
+        except InvalidTag:
+            raise ValueError("Decryption failed: wrong key or corrupted payload") from None
+
+def encrypted_size(size, chunk_shift=AEAD_CHUNK_SHIFT):
+    """Length of the encrypt_message output for size bytes of plaintext"""
+    chunks = max(1, -(-size >> chunk_shift))
+    return _AEAD_HEAD.size + size + chunks * AEAD_TAG_SIZE
 
 def encrypt_message(message, key):
-    cipher = Fernet(key)
-    return cipher.encrypt(message.encode())
+    """Encrypt text or bytes into the binary chunked AES-GCM format"""
+    data = message if isinstance(message, bytes) else message.encode()
+    return b''.join(encrypt_stream([data], key))
+
+def decrypt_payload(encrypted_msg, key):
+    """Decrypt a payload from encrypt_message (or a legacy Fernet token) to bytes
+
+    Recipient envelopes are decrypted too, with key being a private RSA key.
+    """
+    if encrypted_msg[:1] == bytes([ENVELOPE_FORMAT]):
+        return decrypt_envelope(encrypted_msg, key)
+    if encrypted_msg[:1] == bytes([AEAD_FORMAT]):
+        return b''.join(decrypt_stream([encrypted_msg], key))
+    try:
+        return Fernet(key).decrypt(encrypted_msg)
+    except (InvalidToken, ValueError):
+        raise ValueError("Decryption failed: wrong key or corrupted payload") from None
 
 def decrypt_message(encrypted_msg, key):
-    cipher = Fernet(key)
-    return cipher.decrypt(encrypted_msg).decode()
+    """Like decrypt_payload, decoding the result as UTF-8 text"""
+    return decrypt_payload(encrypted_msg, key).decode()
+
+def encrypt_envelope(message, public_keys):
+    """Encrypt message once and wrap its content key for every public key"""
+    data = message if isinstance(message, bytes) else message.encode()
+    content_key = generate_key()
+    raw_key = base64.urlsafe_b64decode(content_key)
+    parts = [_ENVELOPE_HEAD.pack(ENVELOPE_FORMAT, len(public_keys))]
+    for public_key in public_keys:
+        key, fingerprint = load_rsa_key(public_key)
+        wrapped = PKCS1_OAEP.new(key, SHA256).encrypt(raw_key)
+        parts.append(_RECIPIENT.pack(fingerprint, len(wrapped)) + wrapped)
+    parts.extend(encrypt_stream([data], content_key))
+    return b''.join(parts)
+
+def envelope_size(size, public_keys):
+    """Length of the encrypt_envelope output for size bytes of plaintext
+
+    Each wrapped key is as long as its RSA modulus, so no encryption is done.
+    """
+    wrapped = sum(_RECIPIENT.size + load_rsa_key(key)[0].size_in_bytes() for key in public_keys)
+    return _ENVELOPE_HEAD.size + wrapped + encrypted_size(size)
+
+def decrypt_envelope(envelope, private_key):
+    """Decrypt an envelope with one recipient's private key, returning bytes"""
+    key, fingerprint = load_rsa_key(private_key)
+    fmt, count = _ENVELOPE_HEAD.unpack_from(envelope)
+    if fmt != ENVELOPE_FORMAT:
+        raise ValueError("Not a recipient envelope")
+    offset = _ENVELOPE_HEAD.size
+    wrapped = None
+    for _ in range(count):
+        recipient, length = _RECIPIENT.unpack_from(envelope, offset)
+        offset += _RECIPIENT.size
+        if recipient == fingerprint:
+            wrapped = envelope[offset:offset + length]
+        offset += length
+    if wrapped is None:
+        raise ValueError("This private key is not among the envelope recipients")
+    try:
+        raw_key = PKCS1_OAEP.new(key, SHA256).decrypt(wrapped)
+    except ValueError:
+        raise ValueError("Decryption failed: wrong key or corrupted payload") from None
+    return b''.join(decrypt_stream([envelope[offset:]], base64.urlsafe_b64encode(raw_key)))
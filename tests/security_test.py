@@ -1,4 +1,6 @@
+import os
 import pytest
+from cryptography.fernet import Fernet
 from src.utils import *
 
 def test_encryption_integrity():
@@ -31,8 +33,57 @@ def test_binary_data():
     enc = encrypt_hybrid(pub, binary_data.decode('latin-1'))
     assert decrypt_hybrid(priv, *enc).encode('latin-1') == binary_data
 
+def test_chunked_aead_round_trip():
+    """Binary AES-GCM payloads: small fixed overhead, streamable, authenticated"""
+    key = generate_key()
+    data = os.urandom(200000)
+    enc = encrypt_message(data, key)
+    assert len(enc) == len(data) + 9 + 16 * 4  # head + one tag per 64 KiB chunk
+    assert [len(encrypt_message(b"x" * n, key)) for n in (0, 65536, 65537)] == \
+        [encrypted_size(n) for n in (0, 65536, 65537)]
+    pieces = [enc[i:i + 999] for i in range(0, len(enc), 999)]
+    assert b"".join(decrypt_stream(pieces, key)) == data
+    assert b"".join(decrypt_stream(encrypt_stream(iter([data[:5], data[5:]]), key), key)) == data
+
+def test_chunked_aead_rejects_tampering():
+    key = generate_key()
+    enc = bytearray(encrypt_message(b"x" * 70000, key))
+    with pytest.raises(ValueError):
+        decrypt_message(bytes(enc[:9 + 65536 + 16]), key)  # Final chunk dropped
+    enc[20] ^= 1
+    with pytest.raises(ValueError):
+        decrypt_message(bytes(enc), key)
+    with pytest.raises(ValueError):
+        decrypt_message(encrypt_message("x", key), generate_key())
+
+def test_legacy_fernet_tokens():
+    key = generate_key()
+    token = Fernet(key).encrypt(b"old message")
+    assert decrypt_message(token, key) == "old message"
+
+def test_envelope_multiple_recipients():
+    """One ciphertext, content key wrapped per recipient"""
+    keys = [generate_rsa_keys() for _ in range(3)]
+    envelope = encrypt_envelope("to everyone", [pub for _, pub in keys[:2]])
+    assert len(envelope) == envelope_size(len("to everyone"), [pub for _, pub in keys[:2]])
+    for priv, _ in keys[:2]:
+        assert decrypt_message(envelope, priv) == "to everyone"
+    with pytest.raises(ValueError):
+        decrypt_envelope(envelope, keys[2][0])
+
+def test_key_cache_parses_once():
+    priv, pub = generate_rsa_keys()
+    key, fingerprint = load_rsa_key(pub)
+    assert load_rsa_key(pub)[0] is key
+    assert load_rsa_key(priv)[1] == fingerprint
+
 if __name__ == "__main__":
     test_encryption_integrity()
     test_key_validation() 
     test_binary_data()
+    test_chunked_aead_round_trip()
+    test_chunked_aead_rejects_tampering()
+    test_legacy_fernet_tokens()
+    test_envelope_multiple_recipients()
+    test_key_cache_parses_once()
     print("All security tests passed")
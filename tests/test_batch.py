@@ -0,0 +1,46 @@
+import io
+import json
+import os
+from src.batch import load_manifest, run_batch
+
+TEST_AUDIO = os.path.join(os.path.dirname(__file__), "../examples/test.wav")
+
+def test_manifest_formats(tmp_path):
+    """CSV and JSONL manifests load to the same jobs"""
+    csv_path = tmp_path / "jobs.csv"
+    csv_path.write_text("type,input,output,message,encrypt\naudio,in.wav,out.wav,hi,yes\n")
+    jsonl_path = tmp_path / "jobs.jsonl"
+    jsonl_path.write_text(json.dumps({"type": "audio", "input": "in.wav", "output": "out.wav",
+                                      "message": "hi", "encrypt": True}) + "\n")
+    
+    assert load_manifest(str(csv_path)) == load_manifest(str(jsonl_path))
+    assert load_manifest(str(csv_path))[0]["mode"] == "encode"
+
+def test_batch_round_trip(tmp_path):
+    """Encode jobs report keys, decode jobs report messages, failures are isolated"""
+    message_file = tmp_path / "msg.txt"
+    message_file.write_text("from a file")
+    jobs = [
+        {"type": "audio", "mode": "encode", "input": TEST_AUDIO,
+         "output": str(tmp_path / "a.wav"), "message": "plain", "encrypt": False},
+        {"type": "audio", "mode": "encode", "input": TEST_AUDIO,
+         "output": str(tmp_path / "b.wav"), "message_file": str(message_file), "encrypt": True},
+        {"type": "audio", "mode": "encode", "input": "missing.wav",
+         "output": str(tmp_path / "c.wav"), "message": "x", "encrypt": False},
+    ]
+    report = io.StringIO()
+    assert run_batch(jobs, workers=2, report=report) == 1
+    results = {r["job"]: r for r in map(json.loads, report.getvalue().splitlines())}
+    assert results[0]["status"] == "ok" and "seconds" in results[0]
+    assert results[2]["status"] == "error"
+    
+    decode_jobs = [
+        {"type": "audio", "mode": "decode", "input": str(tmp_path / "a.wav"), "encrypt": False},
+        {"type": "audio", "mode": "decode", "input": str(tmp_path / "b.wav"), "encrypt": True,
+         "key": results[1]["key"]},
+    ]
+    report = io.StringIO()
+    assert run_batch(decode_jobs, workers=2, report=report) == 0
+    results = {r["job"]: r for r in map(json.loads, report.getvalue().splitlines())}
+    assert results[0]["message"] == "plain"
+    assert results[1]["message"] == "from a file"
@@ -0,0 +1,20 @@
+import copy
+from benchmarks.run import compare, run_case
+
+def test_cases_round_trip_and_report_metrics():
+    for carrier in ("image", "audio", "pdf"):
+        result = run_case(carrier, 2048, repeat=1)
+        assert result["encode_payload_mbps"] > 0 and result["decode_payload_mbps"] > 0
+        assert result["peak_rss_mb"] > 0 and result["encode_tracemalloc_mb"] > 0
+
+def test_compare_flags_regressions_past_tolerance():
+    baseline = {"results": [{"carrier": "audio", "size": 1 << 20, "encode_s": 0.05,
+                             "decode_s": 0.001, "encode_payload_mbps": 20.0,
+                             "decode_payload_mbps": 1000.0, "peak_rss_mb": 50.0}]}
+    results = copy.deepcopy(baseline)
+    assert compare(results, baseline) == []
+
+    results["results"][0].update(encode_payload_mbps=10.0, decode_payload_mbps=1.0, peak_rss_mb=60.0)
+    regressions = compare(results, baseline, tolerance=0.3)
+    assert len(regressions) == 1 and "encode_payload_mbps" in regressions[0]  # decode is under the noise floor
+    assert len(compare(results, baseline, tolerance=0.1)) == 2
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+import pytest
+import carriers
+
+SRC = os.path.join(os.path.dirname(__file__), "../src")
+
+def _loaded_after(code):
+    """Top-level modules present after running code in a fresh interpreter"""
+    script = f"import sys; sys.path.insert(0, {SRC!r}); {code}; print(' '.join(sys.modules))"
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return set(out.stdout.split())
+
+def test_cli_core_imports_no_carrier_libraries():
+    loaded = _loaded_after("import stego")
+    assert not loaded & {"numpy", "PIL", "PyPDF2", "Crypto", "cryptography"}
+
+def test_carriers_import_only_their_dependencies():
+    assert "PyPDF2" not in _loaded_after("import carriers; carriers.get('audio')")
+    assert "numpy" not in _loaded_after("import carriers; carriers.get('pdf')")
+
+def test_plugin_interface():
+    for name in carriers.names():
+        plugin = carriers.get(name)
+        assert plugin.NAME == name
+        for attr in ("EXTENSIONS", "capacity", "embed", "extract", "detect", "cli_options"):
+            assert hasattr(plugin, attr)
+    with pytest.raises(ValueError, match="Unknown carrier"):
+        carriers.get("video")
+
+def test_stego_reexports_plugin_functions():
+    import stego
+    assert stego.encode_image is carriers.get("image").encode_image
+    with pytest.raises(AttributeError):
+        stego.encode_video
@@ -0,0 +1,111 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+import carriers
+import stego
+from utils import generate_rsa_keys
+from src.catalog import Catalog
+
+def _cover(path, height, width, channels=3):
+    Image.fromarray(np.zeros((height, width, channels), dtype=np.uint8)).save(path)
+
+def test_pick_smallest_fitting_cover(tmp_path):
+    """pick returns the smallest cover whose capacity covers the payload"""
+    covers = tmp_path / "covers"
+    covers.mkdir()
+    _cover(covers / "small.png", 10, 10)
+    _cover(covers / "medium.png", 40, 40)
+    _cover(covers / "large.bmp", 100, 100)
+    _cover(covers / "rgba.png", 20, 20, channels=4)
+    
+    catalog = Catalog(str(tmp_path / "covers.db"))
+    assert catalog.refresh(str(covers))["added"] == 4
+    
+    assert catalog.pick(10).endswith("small.png")
+    assert catalog.pick(200).endswith("medium.png")
+    assert catalog.pick(2000).endswith("large.bmp")
+    assert catalog.pick(10**6) is None
+    assert catalog.pick(500, depth=4, alpha=True).endswith("rgba.png")
+    catalog.close()
+
+def test_pick_counts_the_codec_header_byte(tmp_path):
+    """At depth 4 the codec byte moves the payload start, costing 3 bytes here"""
+    covers = tmp_path / "covers"
+    covers.mkdir()
+    _cover(covers / "small.png", 20, 20)
+    _cover(covers / "large.png", 30, 30)
+    
+    catalog = Catalog(str(tmp_path / "covers.db"))
+    catalog.refresh(str(covers))
+    assert catalog.pick(543, depth=4).endswith("small.png")
+    assert catalog.pick(540, depth=4, codec=True).endswith("small.png")
+    assert catalog.pick(541, depth=4, codec=True).endswith("large.png")
+    catalog.close()
+    
+    image = carriers.get("image")
+    assert image.image_capacity(20, 20, 4) == 543
+    assert image.image_capacity(20, 20, 4, codec=True) == 540
+    with pytest.raises(ValueError, match="max: 540 chars"):
+        image.encode_image(str(covers / "small.png"), os.urandom(541), str(tmp_path / "out.png"),
+                           depth=4, compress='zlib')
+
+def test_incremental_refresh(tmp_path):
+    """Unchanged files are skipped, changed ones re-probed, deleted ones dropped"""
+    covers = tmp_path / "covers"
+    covers.mkdir()
+    _cover(covers / "a.png", 10, 10)
+    _cover(covers / "b.png", 10, 10)
+    
+    catalog = Catalog(str(tmp_path / "covers.db"))
+    catalog.refresh(str(covers))
+    
+    os.utime(covers / "a.png", (0, 0))  # Touched, same content
+    _cover(covers / "b.png", 50, 50)
+    stats = catalog.refresh(str(covers))
+    assert (stats["unchanged"], stats["updated"]) == (1, 1)
+    assert catalog.pick(500).endswith("b.png")
+    
+    os.remove(covers / "b.png")
+    assert catalog.refresh(str(covers))["removed"] == 1
+    assert catalog.pick(500) is None
+    catalog.close()
+
+def test_unreadable_covers_fail_without_aborting(tmp_path):
+    """Broken files are counted as failed, and a cover that breaks is dropped"""
+    covers = tmp_path / "covers"
+    covers.mkdir()
+    _cover(covers / "a.png", 50, 50)
+    (covers / "empty.wav").write_bytes(b"")
+    (covers / "short.wav").write_bytes(b"RIFF\x24\x00\x00\x00WAVEfmt ")
+
+    catalog = Catalog(str(tmp_path / "covers.db"))
+    stats = catalog.refresh(str(covers))
+    assert (stats["added"], stats["failed"]) == (1, 2)
+    assert catalog.pick(100).endswith("a.png")
+
+    (covers / "a.png").write_bytes(b"not an image any more")
+    assert catalog.refresh(str(covers))["failed"] == 3
+    assert catalog.pick(100) is None
+    assert catalog.db.execute("SELECT COUNT(*) FROM capacity").fetchone()[0] == 0
+    catalog.close()
+
+def test_cli_sizes_encrypted_payloads_for_the_pick(tmp_path, capsys):
+    """The envelope overhead (one wrapped key per recipient) is counted in the pick"""
+    covers = tmp_path / "covers"
+    covers.mkdir()
+    _cover(covers / "small.png", 20, 20)
+    _cover(covers / "medium.png", 40, 40)
+    db = str(tmp_path / "covers.db")
+    assert stego.main(["catalog", str(covers), "--db", db]) == 0
+    private, public = generate_rsa_keys()
+    (tmp_path / "public.pem").write_bytes(public)
+    (tmp_path / "private.pem").write_bytes(private)
+
+    output = str(tmp_path / "out.png")
+    assert stego.main(["-e", "-t", "image", "--catalog", db, "-m", "hi", "-o", output,
+                       "--recipient", str(tmp_path / "public.pem")]) == 0
+    assert "medium.png" in capsys.readouterr().out
+    assert stego.main(["-d", "-t", "image", "-i", output,
+                       "--private-key", str(tmp_path / "private.pem")]) == 0
+    assert "hi" in capsys.readouterr().out
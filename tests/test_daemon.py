@@ -0,0 +1,81 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+import client
+import daemon as stego_daemon
+
+SRC = os.path.join(os.path.dirname(__file__), "../src")
+TEST_AUDIO = os.path.abspath(os.path.join(os.path.dirname(__file__), "../examples/test.wav"))
+
+@pytest.fixture
+def daemon(tmp_path):
+    """A `stego.py serve` process on a private socket"""
+    path = str(tmp_path / "stego.sock")
+    proc = subprocess.Popen([sys.executable, os.path.join(SRC, "stego.py"), "serve",
+                             "--socket", path, "--workers", "2"], stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(path):
+        assert proc.poll() is None and time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.05)
+    yield path
+    proc.terminate()
+    proc.wait(timeout=10)
+    assert not os.path.exists(path)
+
+def test_client_forwards_cli_arguments(daemon, tmp_path, capsys, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Relative paths resolve in the client's directory
+    assert client.main(["--socket", daemon, "-e", "-t", "audio", "-i", TEST_AUDIO,
+                        "-o", "out.wav", "-m", "via daemon"]) == 0
+    assert (tmp_path / "out.wav").exists()
+    assert client.main(["--socket", daemon, "-d", "-t", "audio", "-i", "out.wav"]) == 0
+    assert "Decoded message: via daemon" in capsys.readouterr().out
+
+    assert client.main(["--socket", daemon, "-d", "-t", "audio", "-i", "missing.wav"]) == 1
+    assert client.main(["--socket", daemon, "-d", "-t", "video"]) == 2
+    assert "invalid choice" in capsys.readouterr().err
+
+def test_probe_job_and_bad_requests(daemon, tmp_path):
+    probe = client.request({"op": "probe", "input": TEST_AUDIO}, daemon)
+    assert probe["status"] == "ok" and probe["type"] == "audio" and probe["capacity"] > 0
+
+    output = str(tmp_path / "job.wav")
+    job = client.request({"op": "job", "job": {"type": "audio", "input": TEST_AUDIO,
+                                               "output": output, "message": "job",
+                                               "encrypt": "yes"}}, daemon)
+    assert job["status"] == "ok" and job["key"]
+    job = client.request({"op": "job", "job": {"type": "audio", "mode": "decode", "input": output,
+                                               "encrypt": True, "key": job["key"]}}, daemon)
+    assert job["message"] == "job"
+
+    assert client.request({"op": "launch"}, daemon)["status"] == "error"
+    for command in ("serve", "client", "batch", "scan"):
+        nested = client.request({"op": "run", "argv": [command, "--help"]}, daemon)
+        assert nested["status"] == "error" and "cannot run inside the daemon" in nested["error"]
+    assert client.request({"op": "ping"}, daemon)["workers"] == 2
+
+def test_requests_over_64_kib(daemon, tmp_path, capsys):
+    output = str(tmp_path / "long.wav")
+    message = "long message " * 6000  # Beyond asyncio's default 64 KiB line limit
+    assert client.main(["--socket", daemon, "-e", "-t", "audio", "-i", TEST_AUDIO, "-o", output,
+                        "-m", message, "--compress", "zlib"]) == 0
+    response = client.request({"op": "run", "argv": ["-d", "-t", "audio", "-i", output]}, daemon)
+    assert response["status"] == "ok" and message in response["stdout"]
+
+def test_oversized_request_gets_an_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(stego_daemon, "REQUEST_LIMIT", 1024)
+    server = stego_daemon.Daemon(str(tmp_path / "small.sock"), workers=1)
+    ready = threading.Event()
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(ready.set),))
+    thread.start()
+    try:
+        assert ready.wait(30)
+        response = client.request({"op": "run", "argv": ["-m", "x" * 4096]}, server.path)
+        assert response["status"] == "error" and "longer than 1024 bytes" in response["error"]
+        assert client.request({"op": "ping"}, server.path)["status"] == "ok"
+    finally:
+        server.stop()
+        thread.join(30)
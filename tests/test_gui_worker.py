@@ -0,0 +1,60 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import profiling
+from gui_worker import Cancelled, Job, thumbnail
+from src.stego import decode_audio, encode_audio
+
+TEST_AUDIO = os.path.join(os.path.dirname(__file__), "../examples/test.wav")
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        yield pool
+
+def test_job_reports_stage_and_loop_progress(tmp_path, executor):
+    output = str(tmp_path / "out.wav")
+    job = Job(encode_audio, TEST_AUDIO, "in the background", output, block_frames=4096).submit(executor)
+    assert job.result() is None
+    assert job.stage in ("read", "write") and job.fraction == 1.0
+    assert decode_audio(output) == "in the background"
+    assert not profiling._observers
+
+def test_cancel_stops_at_next_progress_callback(executor):
+    started, release = threading.Event(), threading.Event()
+
+    def loop():
+        for done in range(1, 1000):
+            profiling.progress(done, 1000)
+            started.set()
+            release.wait()
+        return "finished"
+
+    job = Job(loop).submit(executor)
+    started.wait()
+    assert job.fraction == 0.001
+    job.cancel()
+    release.set()
+    with pytest.raises(Cancelled):
+        job.result()
+    assert job.cancelled
+
+def test_eta_follows_the_loop_rate():
+    job = Job(None)
+    assert job.eta() is None
+    job._advance(0.1)
+    job._loop = (job._loop[0] - 2.0, 0.1)  # Loop started 2 s ago at 10%
+    job._advance(0.5)
+    assert 2.4 < job.eta() < 2.6
+    job._advance(0.2)  # A new loop restarts the estimate
+    assert job.eta() is None
+
+def test_thumbnail_is_small_and_cached(tmp_path):
+    from PIL import Image
+    path = str(tmp_path / "big.png")
+    Image.new("RGB", (2000, 1000), "red").save(path)
+    mtime = os.stat(path).st_mtime_ns
+    preview = thumbnail(path, mtime)
+    assert preview.size == (160, 80) and preview.mode == "RGB"
+    assert thumbnail(path, mtime) is preview
@@ -0,0 +1,144 @@
+import os
+import struct
+import zlib
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+from src.stego import encode_pdf, decode_pdf
+from src.pdf_io import LazyPdfReader
+
+@pytest.fixture
+def cover_pdf(tmp_path):
+    writer = PdfWriter()
+    for _ in range(3):
+        writer.add_blank_page(612, 792)
+    writer.add_metadata({'/Title': 'Report'})
+    path = tmp_path / "cover.pdf"
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return str(path)
+
+def test_incremental_update_keeps_original_bytes(cover_pdf, tmp_path):
+    """The original file is an unchanged prefix of the output"""
+    output = str(tmp_path / "out.pdf")
+    encode_pdf(cover_pdf, "héllo ✓", output)
+    
+    with open(cover_pdf, 'rb') as f, open(output, 'rb') as g:
+        original, updated = f.read(), g.read()
+    assert updated.startswith(original)
+    assert len(updated) - len(original) < 1024
+    
+    reader = PdfReader(output, strict=True)
+    assert len(reader.pages) == 3
+    assert reader.metadata['/Title'] == 'Report'
+    assert decode_pdf(output) == "héllo ✓"
+
+def test_incremental_update_chains(cover_pdf, tmp_path):
+    """Updating an updated file (in place) replaces the message"""
+    output = str(tmp_path / "out.pdf")
+    encode_pdf(cover_pdf, "first", output)
+    encode_pdf(output, "second", output)
+    assert decode_pdf(output) == "second"
+    assert len(PdfReader(output).pages) == 3
+
+def test_pdf_without_info(tmp_path):
+    """A trailer without /Info gets a new Info object"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+               b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>"]
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 4\n0000000000 65535 f \n"
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size 4 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % xref
+    cover = tmp_path / "bare.pdf"
+    cover.write_bytes(data)
+    
+    output = str(tmp_path / "out.pdf")
+    encode_pdf(str(cover), "bare", output)
+    assert decode_pdf(output) == "bare"
+    assert PdfReader(output).trailer['/Size'] == 5
+
+def test_full_rewrite_still_available(cover_pdf, tmp_path):
+    output = str(tmp_path / "out.pdf")
+    encode_pdf(cover_pdf, "rewrite", output, incremental=False)
+    assert decode_pdf(output) == "rewrite"
+
+def _xref_stream_pdf(path):
+    """PDF 1.5 file whose objects, Info included, live in an object stream"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+               b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>",
+               b"<< /Title (Packed) /HiddenMessage (packed secret) >>"]
+    header, body = b"", b""
+    for number, obj in enumerate(objects, 1):
+        header += b"%d %d " % (number, len(body))
+        body += obj + b"\n"
+    data = zlib.compress(header + body)
+    pdf = b"%PDF-1.5\n"
+    objstm_offset = len(pdf)
+    pdf += b"5 0 obj\n<< /Type /ObjStm /N 4 /First %d /Filter /FlateDecode /Length %d >>\nstream\n" % (
+        len(header), len(data)) + data + b"\nendstream\nendobj\n"
+    xref_offset = len(pdf)
+    rows = [(0, 0, 255)] + [(2, 5, i) for i in range(4)] + [(1, objstm_offset, 0), (1, xref_offset, 0)]
+    table = zlib.compress(b"".join(struct.pack('>BIH', *row) for row in rows))
+    pdf += b"6 0 obj\n<< /Type /XRef /Size 7 /W [1 4 2] /Root 1 0 R /Info 4 0 R /Filter /FlateDecode /Length %d >>\nstream\n" % len(table)
+    pdf += table + b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % xref_offset
+    path.write_bytes(pdf)
+    return str(path)
+
+def test_xref_stream_and_object_stream(tmp_path):
+    """Trailer-only reading resolves Info from a compressed object stream"""
+    cover = _xref_stream_pdf(tmp_path / "packed.pdf")
+    with LazyPdfReader(cover) as reader:
+        assert reader.page_count == 1
+        assert reader.metadata['/Title'] == 'Packed'
+        assert reader._full is None
+    assert decode_pdf(cover) == "packed secret"
+    
+    output = str(tmp_path / "out.pdf")
+    encode_pdf(cover, "updated", output)
+    assert decode_pdf(output) == "updated"
+    assert PdfReader(output).metadata['/Title'] == 'Packed'
+
+def test_damaged_xref_falls_back(cover_pdf, tmp_path):
+    """A wrong startxref offset is handled by the full PyPDF2 reader"""
+    with open(cover_pdf, 'rb') as f:
+        data = f.read()
+    start = data.rindex(b'startxref')
+    damaged = tmp_path / "damaged.pdf"
+    damaged.write_bytes(data[:start] + b"startxref\n17\n%%EOF\n")
+    with LazyPdfReader(str(damaged)) as reader:
+        assert reader.metadata['/Title'] == 'Report'
+        assert reader._full is not None
+
+def test_stream_mode_binary_and_encrypted(cover_pdf, tmp_path):
+    """Stream mode carries large and encrypted payloads through one reference"""
+    output = str(tmp_path / "out.pdf")
+    secret = "large payload ✓ " * 20000
+    encode_pdf(cover_pdf, secret, output, mode='stream')
+    assert decode_pdf(output) == secret
+    assert os.path.getsize(output) - os.path.getsize(cover_pdf) < len(secret) // 10
+    
+    key = encode_pdf(cover_pdf, "encrypted", output, encrypt=True)
+    assert decode_pdf(output, decrypt=True, key=key) == "encrypted"
+    reader = PdfReader(output)
+    assert '/HiddenMessage' not in reader.metadata
+    assert reader.metadata['/HiddenPayload'].get_data()[:3] == b'\x89PV'
+
+def test_switching_modes_replaces_message(cover_pdf, tmp_path):
+    output = str(tmp_path / "out.pdf")
+    encode_pdf(cover_pdf, "in a stream", output, mode='stream')
+    encode_pdf(output, "in metadata", output)
+    assert decode_pdf(output) == "in metadata"
+    encode_pdf(output, "stream again", output, mode='stream', incremental=False)
+    assert decode_pdf(output) == "stream again"
+    assert len(PdfReader(output).pages) == 3
+
+def test_stream_mode_compressed(cover_pdf, tmp_path):
+    output = str(tmp_path / "out.pdf")
+    encode_pdf(cover_pdf, "compress me " * 500, output, compress='lzma')
+    assert decode_pdf(output) == "compress me " * 500
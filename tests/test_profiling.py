@@ -0,0 +1,58 @@
+import json
+import os
+import profiling
+from profiling import Observer, Profile, stage
+from src.stego import main, decode_audio, encode_audio
+
+TEST_AUDIO = os.path.join(os.path.dirname(__file__), "../examples/test.wav")
+
+def test_stages_are_free_without_observers():
+    assert stage("embed") is stage("write")
+    with stage("embed", 10) as s:
+        pass
+    assert s.nbytes is None
+
+def test_profile_records_carrier_stages(tmp_path):
+    output = str(tmp_path / "out.wav")
+    with Profile() as profile:
+        key = encode_audio(TEST_AUDIO, "profiled", output, encrypt=True, compress="zlib")
+        assert decode_audio(output, True, key) == "profiled"
+    stages = {entry["stage"]: entry for entry in profile.report()["stages"]}
+    assert {"validate", "serialize", "read", "embed", "write", "extract", "decrypt"} <= set(stages)
+    assert stages["validate"]["calls"] == 2
+    assert stages["embed"]["bytes"] > 0 and stages["embed"]["peak_bytes"] > 0
+    assert not profiling._observers
+
+def test_observers_see_nested_stages():
+    class Recorder(Observer):
+        def __init__(self):
+            self.events = []
+        def start(self, name):
+            self.events.append(("start", name))
+        def finish(self, name, seconds, nbytes):
+            self.events.append(("finish", name, nbytes))
+
+    recorder = Recorder()
+    profiling.add_observer(recorder)
+    try:
+        with stage("outer"):
+            with stage("inner", 5):
+                pass
+    finally:
+        profiling.remove_observer(recorder)
+    assert recorder.events == [("start", "outer"), ("start", "inner"),
+                               ("finish", "inner", 5), ("finish", "outer", None)]
+
+    with Profile(memory=False) as profile:
+        with stage("outer"):
+            with stage("inner", 5):
+                pass
+    assert [entry["stage"] for entry in profile.report()["stages"]] == ["outer", "outer/inner"]
+
+def test_cli_profile_flags(tmp_path):
+    report, stats = tmp_path / "profile.json", tmp_path / "run.pstats"
+    assert main(["-e", "-t", "audio", "-i", TEST_AUDIO, "-o", str(tmp_path / "out.wav"),
+                 "-m", "hi", "--profile", str(report), "--cprofile", str(stats)]) == 0
+    data = json.loads(report.read_text())
+    assert data["mode"] == "encode" and data["stages"][0]["stage"] == "validate"
+    assert stats.stat().st_size > 0
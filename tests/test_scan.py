@@ -0,0 +1,99 @@
+import io
+import json
+import os
+import shutil
+import wave
+import numpy as np
+import pytest
+from PIL import Image
+from PyPDF2 import PdfWriter
+import carriers
+import scan
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Covers with and without payloads, plus files no carrier handles"""
+    root = tmp_path / "corpus"
+    (root / "nested").mkdir(parents=True)
+    pixels = np.random.RandomState(2).randint(0, 256, (40, 50, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(root / "clean.png")
+    Image.fromarray(pixels).save(root / "clean.bmp")
+    with wave.open(str(root / "clean.wav"), 'wb') as audio:
+        audio.setnchannels(1)
+        audio.setsampwidth(2)
+        audio.setframerate(44100)
+        audio.writeframes(os.urandom(4000))
+    writer = PdfWriter()
+    writer.add_blank_page(612, 792)
+    with open(root / "clean.pdf", 'wb') as f:
+        writer.write(f)
+
+    carriers.get("image").embed(str(root / "clean.png"), "png hit", str(root / "nested" / "hit.png"))
+    carriers.get("image").embed(str(root / "clean.bmp"), "bmp hit", str(root / "nested" / "hit.bmp"))
+    carriers.get("audio").embed(str(root / "clean.wav"), "wav hit", str(root / "hit.wav"))
+    carriers.get("pdf").embed(str(root / "clean.pdf"), "pdf info", str(root / "info.pdf"))
+    carriers.get("pdf").embed(str(root / "clean.pdf"), "pdf stream", str(root / "nested" / "stream.pdf"),
+                              mode='stream')
+    shutil.copy(root / "nested" / "hit.png", root / "nested" / "renamed.dat")
+    (root / "notes.txt").write_text("not a carrier")
+    (root / "fake.png").write_text("not an image either")
+    (root / "bmw.txt").write_text("BMW service notes: oil changed at 40,000 km")
+    (root / "README").write_text("Readers accept files whose header reads %PDF-1.4 or later")
+    (root / "nested" / "broken.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 64)
+    return root
+
+def _lines(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+def test_scan_finds_and_extracts_hits(corpus):
+    report = io.StringIO()
+    counts = scan.run_scan([str(corpus)], workers=2, report=report)
+    hits = {os.path.basename(r['path']): r for r in _lines(report.getvalue())}
+    assert {name: r['message'] for name, r in hits.items()} == {
+        "hit.png": "png hit", "hit.bmp": "bmp hit", "renamed.dat": "png hit",
+        "hit.wav": "wav hit", "info.pdf": "pdf info", "stream.pdf": "pdf stream"}
+    assert hits["hit.wav"]["type"] == "audio" and hits["hit.wav"]["bytes"] == len("wav hit")
+    assert counts == {'hit': 6, 'miss': 4, 'skipped': 5, 'error': 0, 'resumed': 0}
+
+def test_sniff_needs_real_headers(corpus):
+    bmp = (corpus / "clean.bmp").read_bytes()
+    assert scan.sniff(bmp[:scan.SNIFF_SIZE], len(bmp)) == 'image'
+    assert scan.sniff(bmp[:scan.SNIFF_SIZE], 100) is None  # Declares more than the file holds
+    assert scan.sniff(b"BMW service notes".ljust(64)) is None
+    assert scan.sniff(b"%PDF-1.7\n%...") == scan.sniff(b"junk\r\n%PDF-1.4\n") == 'pdf'
+    assert scan.sniff(b"see the %PDF-1.4 header") is None
+
+    result = scan.scan_file(str(corpus / "nested" / "broken.png"))
+    assert result['status'] == 'skipped' and result['type'] == 'image' and result['reason']
+
+def test_scan_all_and_no_extract(corpus):
+    report = io.StringIO()
+    scan.run_scan([str(corpus / "clean.png"), str(corpus / "nested")], workers=1, report=report,
+                  extract=False, include_all=True)
+    results = {os.path.basename(r['path']): r for r in _lines(report.getvalue())}
+    assert results["clean.png"]["status"] == "miss"
+    assert results["hit.png"]["status"] == "hit" and "message" not in results["hit.png"]
+    assert len(results) == 6
+
+def test_checkpoint_resumes_and_rescans_changed_files(corpus, tmp_path):
+    path = str(tmp_path / "scan.ckpt")
+    checkpoint = scan.Checkpoint(path)
+    scan.run_scan([str(corpus)], workers=2, report=io.StringIO(), checkpoint=checkpoint)
+    checkpoint.close()
+    with open(path, 'a') as f:
+        f.write('{"path": "/torn')  # Interrupted mid-write
+
+    carriers.get("image").embed(str(corpus / "clean.png"), "new", str(corpus / "clean.bmp"))
+    report = io.StringIO()
+    checkpoint = scan.Checkpoint(path)
+    counts = scan.run_scan([str(corpus)], workers=2, report=report, checkpoint=checkpoint)
+    checkpoint.close()
+    assert counts['resumed'] == 14 and counts['hit'] == 1
+    assert [r['message'] for r in _lines(report.getvalue())] == ["new"]
+    assert len(scan.Checkpoint(path).done) == 16  # The old clean.bmp entry stays, unmatched
+
+def test_cli_writes_jsonl(corpus, tmp_path, capsys):
+    output = tmp_path / "hits.jsonl"
+    assert scan.main([str(corpus), "-w", "2", "-o", str(output), "--no-extract"]) == 0
+    assert len(_lines(output.read_text())) == 6
+    assert "6 hits in 15 files" in capsys.readouterr().err
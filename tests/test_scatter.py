@@ -0,0 +1,72 @@
+import os
+import wave
+import numpy as np
+import pytest
+from PIL import Image
+from src.stego import encode_image, decode_image, encode_audio, decode_audio
+from scatter import ScatterOrder
+
+@pytest.mark.parametrize("count", [1, 2, 3, 17, 1000, 4097])
+def test_order_is_a_permutation(count):
+    positions = ScatterOrder(b"key", count)(np.arange(count))
+    assert sorted(positions.tolist()) == list(range(count))
+
+def test_order_depends_on_key_and_size():
+    indices = np.arange(64)
+    order = ScatterOrder("secret", 10**8)
+    assert (order(indices) == ScatterOrder(b"secret", 10**8)(indices)).all()
+    assert (order(indices) != ScatterOrder("other", 10**8)(indices)).any()
+    assert (order(indices) != ScatterOrder("secret", 10**8 + 1)(indices)).any()
+    assert order(indices).max() > 10**7  # Not clustered at the start
+
+@pytest.fixture
+def cover_png(tmp_path):
+    pixels = np.random.RandomState(1).randint(0, 256, (120, 100, 4), dtype=np.uint8)
+    path = tmp_path / "cover.png"
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+@pytest.mark.parametrize("depth,alpha,streaming", [(1, False, False), (1, False, True),
+                                                   (2, True, False), (3, True, True)])
+def test_image_round_trip(cover_png, tmp_path, depth, alpha, streaming):
+    secret = "scattered " * 40
+    output = str(tmp_path / "out.png")
+    encode_image(cover_png, secret, output, depth=depth, alpha=alpha, streaming=streaming,
+                 scatter="pass phrase")
+    for stream in (False, True):
+        assert decode_image(output, streaming=stream, scatter="pass phrase") == secret
+
+    changed = np.flatnonzero((np.asarray(Image.open(output)) != np.asarray(Image.open(cover_png)))
+                             .any(axis=2).reshape(-1))
+    assert changed.min() > 0 and changed.max() > 0.9 * 120 * 100  # Spread over the image
+    with pytest.raises(ValueError, match="scatter"):
+        decode_image(output, scatter="wrong")
+
+def test_image_scatter_from_encryption_key(cover_png, tmp_path, capsys):
+    output = str(tmp_path / "out.png")
+    key = encode_image(cover_png, "sealed", output, encrypt=True, scatter=True)
+    assert decode_image(output, decrypt=True, key=key.decode(), scatter=True) == "sealed"
+    with pytest.raises(ValueError, match="encryption key"):
+        encode_image(cover_png, "sealed", output, scatter=True)
+
+@pytest.mark.parametrize("block_frames", [7, 1 << 16])
+def test_audio_round_trip(tmp_path, block_frames):
+    cover = str(tmp_path / "cover.wav")
+    with wave.open(cover, 'wb') as audio:
+        audio.setnchannels(2)
+        audio.setsampwidth(2)
+        audio.setframerate(44100)
+        audio.writeframes(os.urandom(20000 * 4))
+    output = str(tmp_path / "out.wav")
+    secret = "keyed order " * 20
+    encode_audio(cover, secret, output, block_frames=block_frames, scatter="pw")
+    assert decode_audio(output, scatter="pw") == secret
+
+    with wave.open(cover, 'rb') as a, wave.open(output, 'rb') as b:
+        before = np.frombuffer(a.readframes(20000), dtype='<i2').astype(int)
+        after = np.frombuffer(b.readframes(20000), dtype='<i2').astype(int)
+    changed = np.flatnonzero(before != after) // 2
+    assert np.abs(after - before).max() <= 1
+    assert changed.max() > 0.9 * 20000
+    with pytest.raises(ValueError, match="scatter"):
+        decode_audio(output, scatter="wrong")
@@ -1,7 +1,15 @@
 import pytest
 import os
+import struct
+import tracemalloc
+import wave
+import zlib
+import numpy as np
+from PIL import Image
 from src.stego import encode_image, decode_image, encode_audio, decode_audio
 from src.utils import generate_rsa_keys, encrypt_hybrid, decrypt_hybrid
+from src.payload import compress_payload, decompress_stream, frame_payload
+from src.image_stream import PngStrips
 
 # Test images/audio should be in examples/ folder
 TEST_IMAGE = os.path.join(os.path.dirname(__file__), "../examples/test.png")
@@ -21,12 +29,235 @@ def test_image_encoding(clean_up):
     encode_image(TEST_IMAGE, secret, "temp.png")
     assert decode_image("temp.png") == secret
 
+@pytest.fixture
+def cover_png(tmp_path):
+    """Synthetic RGBA cover with noisy pixels"""
+    pixels = np.random.RandomState(0).randint(0, 256, (64, 80, 4), dtype=np.uint8)
+    path = tmp_path / "cover.png"
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+def test_image_lsb_layout(cover_png, tmp_path):
+    """Message bits land in RGB LSBs in pixel order, alpha untouched"""
+    secret = "Hi"
+    output = str(tmp_path / "out.png")
+    encode_image(cover_png, secret, output)
+    
+    before = np.asarray(Image.open(cover_png)).reshape(-1, 4)
+    after = np.asarray(Image.open(output)).reshape(-1, 4)
+    expected = ''.join(format(b, '08b') for b in frame_payload(secret.encode()))
+    
+    assert ''.join(str(b) for b in (after[:, :3] & 1).reshape(-1)[:len(expected)]) == expected
+    assert (after[:, 3] == before[:, 3]).all()
+    assert (after[:, :3] >> 1 == before[:, :3] >> 1).all()
+    assert decode_image(output) == secret
+
+def test_image_unicode_and_encryption(cover_png, tmp_path, capsys):
+    """Non-Latin-1 text and encrypted bytes survive the round trip"""
+    output = str(tmp_path / "out.png")
+    secret = "Привет, 世界 ✓"
+    encode_image(cover_png, secret, output)
+    assert decode_image(output) == secret
+    
+    encode_image(cover_png, secret, output, encrypt=True)
+    key = capsys.readouterr().out.split("SAVE THIS): ")[1].strip()
+    assert decode_image(output, decrypt=True, key=key.encode()) == secret
+
+def test_image_payload_with_delimiter_pattern(cover_png, tmp_path):
+    """Binary payloads containing the old delimiter are not truncated"""
+    output = str(tmp_path / "out.png")
+    secret = "abc\xff\xfedef"
+    encode_image(cover_png, secret, output)
+    assert decode_image(output) == secret
+
+def test_image_legacy_delimiter_format(cover_png, tmp_path):
+    """Images written with the old delimiter format still decode"""
+    bits = ''.join(format(ord(c), '08b') for c in "legacy") + '1111111111111110'
+    pixels = np.asarray(Image.open(cover_png)).reshape(-1, 4).copy()
+    rgb = pixels[:, :3].reshape(-1)
+    rgb[:len(bits)] = (rgb[:len(bits)] & 0xFE) | np.array([int(b) for b in bits])
+    pixels[:, :3] = rgb.reshape(-1, 3)
+    output = str(tmp_path / "legacy.png")
+    Image.fromarray(pixels.reshape(64, 80, 4)).save(output)
+    assert decode_image(output) == "legacy"
+
+@pytest.mark.parametrize("ext", [".png", ".bmp"])
+def test_image_streaming_matches_in_memory(ext, tmp_path):
+    """Strip-based encoding produces the same pixels as the in-memory path"""
+    pixels = np.random.RandomState(1).randint(0, 256, (50, 40, 3), dtype=np.uint8)
+    cover = str(tmp_path / f"cover{ext}")
+    Image.fromarray(pixels).save(cover)
+    secret = "streamed " * 20
+    
+    encode_image(cover, secret, str(tmp_path / f"stream{ext}"), streaming=True)
+    encode_image(cover, secret, str(tmp_path / f"memory{ext}"))
+    
+    streamed = np.asarray(Image.open(tmp_path / f"stream{ext}"))
+    assert (streamed == np.asarray(Image.open(tmp_path / f"memory{ext}"))).all()
+    assert (streamed[-10:] == pixels[-10:]).all()
+    assert decode_image(str(tmp_path / f"stream{ext}"), streaming=True) == secret
+    
+    other = ".bmp" if ext == ".png" else ".png"
+    with pytest.raises(ValueError, match="keeps the cover's"):
+        encode_image(cover, secret, str(tmp_path / f"stream{other}"), streaming=True)
+    assert not (tmp_path / f"stream{other}").exists()
+
+def _filtered_png(path, pixels):
+    """Write pixels as a PNG whose rows cycle through all five scanline filters"""
+    height, width, channels = pixels.shape
+    rows = pixels.reshape(height, -1).astype(int)
+    raw = b""
+    for y, row in enumerate(rows):
+        ftype = y % 5
+        up = rows[y - 1] if y else np.zeros_like(row)
+        line = bytearray([ftype])
+        for i, value in enumerate(row):
+            left = row[i - channels] if i >= channels else 0
+            corner = up[i - channels] if i >= channels and y else 0
+            estimate = left + up[i] - corner
+            paeth = min((abs(estimate - left), 0, left), (abs(estimate - up[i]), 1, up[i]),
+                        (abs(estimate - corner), 2, corner))[2]
+            line.append((value - [0, left, up[i], (left + up[i]) // 2, paeth][ftype]) % 256)
+        raw += bytes(line)
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 6 if channels == 4 else 2, 0, 0, 0)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        for ctype, data in ((b"IHDR", ihdr), (b"IDAT", zlib.compress(raw)), (b"IEND", b"")):
+            f.write(struct.pack(">I", len(data)) + ctype + data
+                    + struct.pack(">I", zlib.crc32(ctype + data)))
+
+@pytest.mark.parametrize("channels", [3, 4])
+def test_image_streaming_undoes_every_png_filter(channels, tmp_path):
+    pixels = np.random.RandomState(4).randint(0, 256, (25, 30, channels), dtype=np.uint8)
+    cover = str(tmp_path / "filtered.png")
+    _filtered_png(cover, pixels)
+    assert (np.asarray(Image.open(cover)) == pixels).all()
+    strips = [strip for _, strip in PngStrips(cover).strips(strip_rows=7)]
+    assert (np.concatenate(strips).reshape(pixels.shape) == pixels).all()
+
+    output = str(tmp_path / "out.png")
+    encode_image(cover, "every filter", output, streaming=True, alpha=channels == 4)
+    assert decode_image(output, streaming=True) == "every filter"
+    assert (np.asarray(Image.open(output))[5:] == pixels[5:]).all()
+
+@pytest.mark.parametrize("depth,alpha", [(2, False), (4, False), (1, True), (3, True)])
+@pytest.mark.parametrize("streaming", [False, True])
+def test_image_depth_and_alpha(cover_png, tmp_path, depth, alpha, streaming):
+    """Layout is recorded in the header so decode needs no options"""
+    output = str(tmp_path / "out.png")
+    secret = "k-LSB " * 50
+    encode_image(cover_png, secret, output, streaming=streaming, depth=depth, alpha=alpha)
+    
+    changed = np.asarray(Image.open(output)).astype(int) - np.asarray(Image.open(cover_png))
+    assert np.abs(changed).max() < 2 ** depth
+    assert changed[..., 3].any() == alpha
+    assert decode_image(output) == secret
+    assert decode_image(output, streaming=True) == secret
+
+def test_image_depth_raises_capacity(cover_png, tmp_path):
+    """Four bits per RGBA channel hold far more than one bit per RGB channel"""
+    secret = "x" * 5000
+    with pytest.raises(ValueError, match="too large"):
+        encode_image(cover_png, secret, str(tmp_path / "out.png"))
+    encode_image(cover_png, secret, str(tmp_path / "out.png"), depth=4, alpha=True)
+    assert decode_image(str(tmp_path / "out.png")) == secret
+
+@pytest.mark.parametrize("method", ["zlib", "lzma", "auto"])
+def test_image_compression(cover_png, tmp_path, method):
+    """Compressible payloads fit covers they would overflow raw, even encrypted"""
+    secret = '{"event": "login", "user": "alice", "ok": true}\n' * 200
+    output = str(tmp_path / "out.png")
+    with pytest.raises(ValueError, match="too large"):
+        encode_image(cover_png, secret, output)
+    key = encode_image(cover_png, secret, output, encrypt=True, compress=method)
+    assert decode_image(output, decrypt=True, key=key) == secret
+
+def test_auto_compression_skips_incompressible(cover_png, tmp_path):
+    """auto keeps raw data when compression would not help, leaving no codec field"""
+    output = str(tmp_path / "out.png")
+    encode_image(cover_png, "Hi", output, compress='auto')
+    bits = (np.array(Image.open(output))[:, :, :3] & 1).reshape(-1)
+    assert np.packbits(bits[:len(frame_payload(b"Hi")) * 8]).tobytes() == frame_payload(b"Hi")
+
+@pytest.mark.parametrize("size", [5, 5000])
+def test_compression_memory_follows_payload_size(size):
+    """Short payloads do not pay for lzma's full preset-6 dictionary"""
+    data = b"abcde" * (size // 5)
+    tracemalloc.start()
+    try:
+        for method in ("auto", "lzma"):
+            codec, compressed = compress_payload(data, method)
+            assert b"".join(decompress_stream([compressed], codec)) == data
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 8 << 20
+
 def test_audio_encoding(clean_up):
     """Test basic audio steganography"""
     secret = "Audio secret"
     encode_audio(TEST_AUDIO, secret, "temp.wav")
     assert decode_audio("temp.wav") == secret
 
+def _read_samples(path):
+    with wave.open(path, 'rb') as audio:
+        return np.frombuffer(audio.readframes(audio.getnframes()), dtype='<i2').astype(int)
+
+def test_audio_touches_only_sample_lsbs(tmp_path):
+    """Embedding changes each 16-bit sample by at most one step"""
+    output = str(tmp_path / "out.wav")
+    encode_audio(TEST_AUDIO, "quiet " * 100, output)
+    assert np.abs(_read_samples(output) - _read_samples(TEST_AUDIO)).max() <= 1
+    assert decode_audio(output) == "quiet " * 100
+
+def test_audio_block_size_does_not_change_output(tmp_path):
+    """Streaming in tiny blocks writes exactly the same WAV"""
+    secret = "blockwise " * 40
+    encode_audio(TEST_AUDIO, secret, str(tmp_path / "a.wav"))
+    encode_audio(TEST_AUDIO, secret, str(tmp_path / "b.wav"), block_frames=7)
+    assert (tmp_path / "a.wav").read_bytes() == (tmp_path / "b.wav").read_bytes()
+    assert decode_audio(str(tmp_path / "b.wav"), block_frames=7) == secret
+
+@pytest.mark.parametrize("channels,width", [(2, 2), (2, 3), (6, 4), (1, 1)])
+def test_audio_multichannel_formats(tmp_path, channels, width):
+    """Stereo/surround and 8/24/32-bit PCM carry one bit per sample"""
+    cover = str(tmp_path / "cover.wav")
+    with wave.open(cover, 'wb') as audio:
+        audio.setnchannels(channels)
+        audio.setsampwidth(width)
+        audio.setframerate(48000)
+        audio.writeframes(os.urandom(1000 * channels * width))
+    
+    secret = "surround " * (10 * channels)
+    output = str(tmp_path / "out.wav")
+    encode_audio(cover, secret, output)
+    assert decode_audio(output) == secret
+    
+    with wave.open(cover, 'rb') as a, wave.open(output, 'rb') as b:
+        before = np.frombuffer(a.readframes(1000), dtype=np.uint8).reshape(-1, width)
+        after = np.frombuffer(b.readframes(1000), dtype=np.uint8).reshape(-1, width)
+    assert (before[:, 1:] == after[:, 1:]).all()
+    assert ((before[:, 0] ^ after[:, 0]) <= 1).all()
+
+def test_audio_compression(tmp_path):
+    output = str(tmp_path / "out.wav")
+    secret = "log line 42: all systems nominal\n" * 300
+    encode_audio(TEST_AUDIO, secret, output, compress='lzma')
+    assert decode_audio(output) == secret
+
+def test_audio_legacy_byte_format(tmp_path):
+    """WAVs written with the old per-byte delimiter format still decode"""
+    with wave.open(TEST_AUDIO, 'rb') as audio:
+        params = audio.getparams()
+        frames = np.frombuffer(audio.readframes(audio.getnframes()), dtype=np.uint8).copy()
+    bits = np.array([int(b) for b in ''.join(format(ord(c), '08b') for c in "old") + '1111111111111110'])
+    frames[:len(bits)] = (frames[:len(bits)] & 0xFE) | bits
+    output = str(tmp_path / "legacy.wav")
+    with wave.open(output, 'wb') as audio:
+        audio.setparams(params)
+        audio.writeframes(frames.tobytes())
+    assert decode_audio(output) == "old"
+
 def test_hybrid_crypto():
     """Test RSA+AES encryption"""
     priv, pub = generate_rsa_keys()